@@ -1,16 +1,18 @@
-from fastapi import APIRouter, HTTPException, Request, Response, status, Depends, Cookie
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Response, status, Depends, Cookie
 from bson import ObjectId
 from jose import JWTError
 from datetime import datetime, timezone, timedelta
 
-from app.core.database import db
-from app.core.dependencies import get_current_active_user
+from app.repositories.users import user_repository
+from app.core.dependencies import bump_token_version, get_current_active_user, invalidate_user_cache
+from app.core.hashing import password_pool
+from app.core.rate_limit import client_ip as get_client_ip, login_throttle
+from app.core.write_behind import last_login_buffer
 from app.core.email import send_verification_email, send_password_reset_email
 from app.schemas.auth import SignupRequest, LoginRequest, ResendVerificationRequest, ForgotPasswordRequest, ResetPasswordRequest
 from app.core.security import (
-    get_password_hash, 
-    verify_password, 
+    password_needs_update,
+    access_token_claims,
     create_access_token,
     create_refresh_token,
     decode_token
@@ -25,22 +27,20 @@ async def signup(data: SignupRequest):
     """Create new user account"""
     
     # Check if email exists
-    existing_email = await db.users.find_one({"email": str(data.email).lower()})
-    if existing_email:
+    if await user_repository.email_exists(str(data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered! Please use a different email to Sign-up."
         )
     
     # Check if user_name exists
-    existing_user_name = await db.users.find_one({"user_name": data.user_name.lower()})
-    if existing_user_name:
+    if await user_repository.user_name_exists(data.user_name):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User name already taken! Choose a different one."
         )
     
-    hashed_password = await run_in_threadpool(get_password_hash, data.password.get_secret_value())
+    hashed_password = await password_pool.hash(data.password.get_secret_value())
     
     # Create user
     new_user = {
@@ -55,8 +55,7 @@ async def signup(data: SignupRequest):
         "updated_at": datetime.now(timezone.utc)
     }
     
-    result = await db.users.insert_one(new_user)
-    user_id = str(result.inserted_id)
+    user_id = str(await user_repository.create(new_user))
     
     # Create verification token (30 min expiry)
     verification_token = create_access_token(
@@ -64,7 +63,7 @@ async def signup(data: SignupRequest):
         expires_delta=timedelta(minutes=30)
     )
     
-    # Send verification email
+    # Queue verification email (delivered by the outbox worker)
     try:
         await send_verification_email(
             email=str(data.email),
@@ -72,7 +71,7 @@ async def signup(data: SignupRequest):
             token=verification_token
         )
     except Exception as e:
-        print(f"Failed to send verification email: {e}")
+        print(f"Failed to queue verification email: {e}")
         # Don't fail signup if email fails
     
     return {
@@ -86,17 +85,36 @@ async def signup(data: SignupRequest):
     }
 
 
+async def _rehash_password(user_id: ObjectId, old_hash: str, password: str):
+    """Re-hash a password stored at an outdated bcrypt cost"""
+    try:
+        new_hash = await password_pool.hash(password)
+        
+        # Only replace the hash we verified, never a concurrent change
+        await user_repository.update(
+            user_id, {"password": new_hash}, extra_filter={"password": old_hash}
+        )
+        invalidate_user_cache(user_id)
+    except Exception as e:
+        # Pool saturated or DB hiccup: the next login will try again
+        print(f"Failed to rehash password: {e}")
+
+
 @router.post("/login")
-async def login(data: LoginRequest, response: Response):
+async def login(
+    data: LoginRequest,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks
+):
     """Login with email/user_name and password"""
 
+    # Shed brute-force bursts before any lookup or bcrypt work
+    client_ip = get_client_ip(request)
+    await login_throttle.check(data.login, client_ip)
+
     # Find user by email or user_name
-    user = await db.users.find_one({
-        "$or": [
-            {"email": data.login.lower()},
-            {"user_name": data.login.lower()}
-        ]
-    })
+    user = await user_repository.get_by_login(data.login, user_repository.LOGIN)
 
     if not user:
         raise HTTPException(
@@ -104,8 +122,7 @@ async def login(data: LoginRequest, response: Response):
             detail="User does not exist"
         )
 
-    password_is_correct = await run_in_threadpool(
-        verify_password, 
+    password_is_correct = await password_pool.verify(
         data.password.get_secret_value(), 
         user["password"]
     )
@@ -128,15 +145,22 @@ async def login(data: LoginRequest, response: Response):
             detail="Account deactivated"
         )
 
-    # Update last login
-    await db.users.update_one(
-        {"_id": user["_id"]},
-        {"$set": {"last_login": datetime.now(timezone.utc)}}
-    )
+    await login_throttle.reset(data.login, client_ip)
+
+    # Upgrade hashes made at a different bcrypt cost, off the response path
+    if password_needs_update(user["password"]):
+        background_tasks.add_task(
+            _rehash_password, user["_id"], user["password"], data.password.get_secret_value()
+        )
+
+    # Update last login (written behind, off the response path)
+    last_login_buffer.record(user["_id"], datetime.now(timezone.utc))
 
     # Create tokens
-    access_token = create_access_token(data={"sub": str(user["_id"])})
-    refresh_token = create_refresh_token(data={"sub": str(user["_id"])})
+    access_token = create_access_token(data=access_token_claims(user))
+    refresh_token = create_refresh_token(
+        data={"sub": str(user["_id"]), "ver": user.get("token_version", 0)}
+    )
 
     # Set refresh token in httponly cookie
     response.set_cookie(
@@ -204,15 +228,22 @@ async def refresh_token(
         user_id = payload.get("sub")
         
         # Check if user still exists and is active
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        user = await user_repository.get_by_id(user_id, user_repository.AUTH)
         if not user or not user.get("is_active"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found or inactive"
             )
         
+        # Refresh tokens issued before a password reset are revoked
+        if payload.get("ver", 0) < user.get("token_version", 0):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked"
+            )
+        
         # Create new access token
-        new_access_token = create_access_token(data={"sub": user_id})
+        new_access_token = create_access_token(data=access_token_claims(user))
         
         return {
             "access_token": new_access_token,
@@ -242,10 +273,10 @@ async def verify_email(token: str):
         user_id = payload.get("sub")
         
         # Update user
-        result = await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": {"is_verified": True, "updated_at": datetime.now(timezone.utc)}}
+        result = await user_repository.update(
+            user_id, {"is_verified": True, "updated_at": datetime.now(timezone.utc)}
         )
+        invalidate_user_cache(user_id)
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -265,7 +296,7 @@ async def verify_email(token: str):
 @router.post("/resend-verification")
 async def resend_verification(request: ResendVerificationRequest):
     """Resend verification email"""
-    user = await db.users.find_one({"email": request.email.lower()})
+    user = await user_repository.get_by_email(request.email, user_repository.EMAIL)
     
     if not user:
         return {"message": "If account exists, verification email has been sent"}
@@ -289,7 +320,7 @@ async def resend_verification(request: ResendVerificationRequest):
             token=verification_token
         )
     except Exception as e:
-        print(f"Failed to send verification email: {e}")
+        print(f"Failed to queue verification email: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to send verification email"
@@ -301,7 +332,7 @@ async def resend_verification(request: ResendVerificationRequest):
 @router.post("/forgot-password")
 async def forgot_password(request: ForgotPasswordRequest):
     """Request password reset"""
-    user = await db.users.find_one({"email": request.email.lower()})
+    user = await user_repository.get_by_email(request.email, user_repository.EMAIL)
     
     if not user:
         return {"message": "If account exists, password reset email has been sent"}
@@ -319,7 +350,7 @@ async def forgot_password(request: ForgotPasswordRequest):
             token=reset_token
         )
     except Exception as e:
-        print(f"Failed to send password reset email: {e}")
+        print(f"Failed to queue password reset email: {e}")
     
     return {"message": "Password reset email sent"}
 
@@ -343,20 +374,18 @@ async def reset_password(token: str, request: ResetPasswordRequest):
             )
         
         user_id = payload.get("sub")
-        hashed_password = await run_in_threadpool(get_password_hash, request.password.get_secret_value())
+        hashed_password = await password_pool.hash(request.password.get_secret_value())
         
-        # Update password
-        result = await db.users.update_one(
-            {"_id": ObjectId(user_id)},
+        # Update password and revoke every token issued before the reset
+        version = await bump_token_version(
+            user_id,
             {
-                "$set": {
-                    "password": hashed_password,
-                    "updated_at": datetime.now(timezone.utc)
-                }
+                "password": hashed_password,
+                "updated_at": datetime.now(timezone.utc)
             }
         )
         
-        if result.modified_count == 0:
+        if version is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
@@ -1,36 +1,93 @@
-from fastapi import APIRouter, UploadFile, HTTPException, status, File, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, UploadFile, HTTPException, status, File, Depends, Query, Request, Response
 from bson import ObjectId
+from pymongo import DeleteOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
 import math
 
 from app.core.cloudinary import upload_book_cover, delete_cloudinary_image
 from app.core.database import db
-from app.core.dependencies import get_current_active_user
+from app.core.dependencies import get_current_principal
+from app.core.library_version import (
+    bump_library_version,
+    check_etag,
+    etag_headers,
+    etag_matches,
+    get_library_version,
+    make_etag,
+)
+from app.core.neighbors import find_neighbors
+from app.core.suggest import suggest_indexes
+from app.core.sync import changes_since, record_deletions
+from app.utils.listing import field_projection, find_page, parse_fields
+from app.utils.indexing import BOOK_INDEX_SOURCES, book_index_fields, stale_index_fields, year_range
+from app.utils.pagination import (
+    cursor_values,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    with_tiebreaker,
+)
+from app.utils.responses import FastJSONResponse
+from app.utils.search import prefix_filter, relevance_stage, search_filter
 from app.schemas.book import (
+    BookBatchResponse,
+    BookBulkRequest,
+    BookBulkResponse,
+    BookChangesResponse,
     BookCreateRequest,
+    BookNeighborsResponse,
     BookUpdateRequest,
+    BookPartialResponse,
     BookResponse,
     BooksListResponse,
     BookStatsResponse,
+    BookSuggestionsResponse,
 )
 
 
 router = APIRouter(tags=["Books"])
 
 
+# Fields a list request may select with `fields=` (id is always returned)
+BOOK_FIELDS = frozenset(BookPartialResponse.model_fields) - {"id"}
+
+# List orders shared by GET /books and prev/next navigation (before the _id tie-breaker)
+BOOK_SORTS = {
+    "date_asc": [("reading_started", 1)],
+    "date_desc": [("reading_started", -1)],
+    "title_asc": [("title_norm", 1)],
+    "title_desc": [("title_norm", -1)],
+    "rating_desc": [("rating", -1)],
+    "author_asc": [("author_norm", 1)],
+    "author_desc": [("author_norm", -1)],
+}
+
+# Most ids one GET /books/batch may ask for
+BATCH_MAX_IDS = 100
+
+# What bulk operations read from the current documents (derived fields, cover cleanup)
+BULK_PROJECTION = {field: 1 for field in (*BOOK_INDEX_SOURCES, "cover_image")}
+
+
 # Helper function to serialize book
-def serialize_book(book: dict) -> dict:
-    """Convert MongoDB document to BookResponse format"""
-    return {
+def serialize_book(book: dict, fields: list[str] | None = None) -> dict:
+    """
+    Convert MongoDB document to BookResponse format
+
+    With `fields` (from a `fields=` selection) the document was fetched with
+    a projection, and only `id` plus those fields are returned.
+    """
+    data = {
         "id": str(book["_id"]),
-        "title": book["title"],
+        "title": book.get("title"),
         "author": book.get("author"),
         "isbn": book.get("isbn"),
         "genre": book.get("genre"),
         "rating": book.get("rating", 0.0),
         "description": book.get("description"),
         "cover_image": book.get("cover_image"),
-        "reading_started": book["reading_started"],
+        "reading_started": book.get("reading_started"),
         "reading_finished": book.get("reading_finished"),
         "is_favorite": book.get("is_favorite", False),
         "page_count": book.get("page_count"),
@@ -38,15 +95,19 @@ def serialize_book(book: dict) -> dict:
         "publication_year": book.get("publication_year"),
         "language": book.get("language", "English"),
         "format": book.get("format"),
-        "created_at": book["created_at"],
-        "updated_at": book["updated_at"],
+        "created_at": book.get("created_at"),
+        "updated_at": book.get("updated_at"),
     }
 
+    if fields is not None:
+        return {"id": data["id"], **{field: data[field] for field in fields}}
+    return data
+
 
 @router.post("/", response_model=BookResponse, status_code=status.HTTP_201_CREATED)
 async def create_book(
     book_data: BookCreateRequest,
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Create a new book entry"""
 
@@ -71,28 +132,164 @@ async def create_book(
         "created_at": datetime.now(timezone.utc),
         "updated_at": datetime.now(timezone.utc),
     }
+    new_book.update(book_index_fields(new_book))
 
     result = await db.books.insert_one(new_book)
     created_book = await db.books.find_one({"_id": result.inserted_id})     # Fetch created book
+    suggest_indexes.book_saved(current_user["_id"], created_book)
+    await bump_library_version(current_user["_id"])
 
     return serialize_book(created_book)
 
 
+async def _delete_covers(urls: list[str]):
+    """Remove deleted books' covers from Cloudinary after the response is sent"""
+    for url in urls:
+        try:
+            await delete_cloudinary_image(url)
+        except Exception as e:
+            print(f"Failed to delete image: {e}")
+
+
+@router.post("/bulk", response_model=BookBulkResponse)
+async def bulk_books(
+    payload: BookBulkRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_principal),
+):
+    """
+    Update, delete or (un)favorite up to 100 books in one request
+
+    Ownership is checked with one `$in` query and every write goes out in a
+    single unordered bulk_write scoped to `user_id`, so a failing item does
+    not stop the others. Each operation gets its own result; covers of
+    deleted books are removed from Cloudinary in the background.
+    """
+    user_id = current_user["_id"]
+    results = [None] * len(payload.operations)
+
+    def report(index, op, status_code, detail=None):
+        results[index] = {"index": index, "id": op.id, "op": op.op, "status": status_code, "detail": detail}
+
+    # Unordered writes to the same book would race, so each id may appear once
+    pending, seen = [], set()
+    for index, op in enumerate(payload.operations):
+        if not ObjectId.is_valid(op.id):
+            report(index, op, status.HTTP_400_BAD_REQUEST, "Invalid book ID")
+        elif op.id in seen:
+            report(index, op, status.HTTP_400_BAD_REQUEST, "Book appears more than once in this request")
+        else:
+            seen.add(op.id)
+            pending.append((index, op, ObjectId(op.id)))
+
+    owned = {}
+    if pending:
+        books = await db.books.find(
+            {"_id": {"$in": [book_id for _, _, book_id in pending]}, "user_id": user_id},
+            BULK_PROJECTION,
+        ).to_list(length=None)
+        owned = {book["_id"]: book for book in books}
+
+    # Build the writes; `applied` lines up with `requests` for error mapping
+    now = datetime.now(timezone.utc)
+    requests, applied = [], []
+    for index, op, book_id in pending:
+        book = owned.get(book_id)
+        if book is None:
+            report(index, op, status.HTTP_404_NOT_FOUND, "Book not found")
+            continue
+
+        scope = {"_id": book_id, "user_id": user_id}
+        changes = {}
+        if op.op == "delete":
+            requests.append(DeleteOne(scope))
+        elif op.op == "favorite" and op.is_favorite is None:
+            # Pipeline update flips the stored value atomically
+            requests.append(UpdateOne(scope, [
+                {"$set": {"is_favorite": {"$not": ["$is_favorite"]}, "updated_at": now}}
+            ]))
+        elif op.op == "favorite":
+            requests.append(UpdateOne(scope, {"$set": {"is_favorite": op.is_favorite, "updated_at": now}}))
+        else:
+            data = op.data.model_dump(exclude_unset=True) if op.data else {}
+            changes = {k: v for k, v in data.items() if v is not None}
+            if not changes:
+                report(index, op, status.HTTP_400_BAD_REQUEST, "No data to update")
+                continue
+            changes["updated_at"] = now
+            if BOOK_INDEX_SOURCES & changes.keys():
+                changes.update(book_index_fields({**book, **changes}))
+            requests.append(UpdateOne(scope, {"$set": changes}))
+        applied.append((index, op, book, changes))
+
+    write_errors = {}
+    if requests:
+        try:
+            await db.books.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            write_errors = {
+                error["index"]: error.get("errmsg", "Write failed") for error in e.details["writeErrors"]
+            }
+
+    deleted_ids, covers = [], []
+    for position, (index, op, book, changes) in enumerate(applied):
+        if position in write_errors:
+            report(index, op, status.HTTP_400_BAD_REQUEST, write_errors[position])
+        elif op.op == "delete":
+            deleted_ids.append(book["_id"])
+            if book.get("cover_image"):
+                covers.append(book["cover_image"])
+            suggest_indexes.book_deleted(user_id, book["_id"])
+            report(index, op, status.HTTP_204_NO_CONTENT)
+        else:
+            if BOOK_INDEX_SOURCES & changes.keys():
+                suggest_indexes.book_saved(user_id, {**book, **changes})
+            report(index, op, status.HTTP_200_OK)
+
+    if deleted_ids:
+        await record_deletions(user_id, "books", deleted_ids)
+    if len(applied) > len(write_errors):
+        await bump_library_version(user_id)
+    if covers:
+        background_tasks.add_task(_delete_covers, covers)
+
+    failed = sum(1 for result in results if result["status"] >= 400)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+
 @router.get("/", response_model=BooksListResponse)
 async def list_books(
+    request: Request,
     favorite: bool | None = Query(None),
     genre: str | None = Query(None),
     author: str | None = Query(None),
     rating_min: float | None = Query(None, ge=0, le=5),
     rating_max: float | None = Query(None, ge=0, le=5),
-    year: int | None = Query(None),
+    year: int | None = Query(None, ge=1, le=9998),
     search: str | None = Query(None),
-    sort: str = Query("date_desc"),
+    sort: str | None = Query(None),
     page: int = Query(1, gt=0),
     limit: int = Query(20, gt=0, le=100),
-    current_user: dict = Depends(get_current_active_user),
+    cursor: str | None = Query(None),
+    fields: str | None = Query(None, description="Comma-separated subset, e.g. title,author,cover_image,rating,is_favorite"),
+    current_user: dict = Depends(get_current_principal),
 ):
-    """List user's books with filters and pagination"""
+    """
+    List user's books with filters and pagination
+
+    Pass `cursor` (the previous page's `next_cursor`) to page by keyset
+    instead of `page`; deep pages then cost the same as the first one.
+
+    `search` matches word prefixes of the title and author through the
+    indexed `search_tokens` field; results default to `relevance` order.
+    `genre`/`author` match the start of the value, ignoring case and accents.
+    `fields` limits both the Mongo projection and the returned book fields.
+    """
+    etag, not_modified = await check_etag(request, current_user["_id"])
+    if not_modified:
+        return not_modified
+
+    selected = parse_fields(fields, BOOK_FIELDS)
 
     # Build query
     query = {"user_id": current_user["_id"]}
@@ -100,11 +297,12 @@ async def list_books(
     if favorite is not None:
         query["is_favorite"] = favorite
 
+    # Case- and accent-insensitive prefix match on the normalized fields
     if genre:
-        query["genre"] = {"$regex": genre, "$options": "i"}
+        query.update(prefix_filter("genre_norm", genre))
 
     if author:
-        query["author"] = {"$regex": author, "$options": "i"}
+        query.update(prefix_filter("author_norm", author))
 
     if rating_min is not None or rating_max is not None:
         query["rating"] = {}
@@ -114,80 +312,212 @@ async def list_books(
             query["rating"]["$lte"] = rating_max
 
     if year:
-        query["$expr"] = {"$eq": [{"$year": "$reading_started"}, year]}
+        query["reading_started"] = year_range(year)
 
+    stages = []
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"author": {"$regex": search, "$options": "i"}},
-        ]
+        query.update(search_filter(search))
+        stages.append(relevance_stage(search))
 
     # Build sort
-    sort_options = {
-        "date_asc": [("reading_started", 1)],
-        "date_desc": [("reading_started", -1)],
-        "title_asc": [("title", 1)],
-        "title_desc": [("title", -1)],
-        "rating_desc": [("rating", -1)],
-        "author_asc": [("author", 1)],
-        "author_desc": [("author", -1)],
-    }
-    sort_by = sort_options.get(sort, [("reading_started", -1)])
+    sort_options = {"relevance": [("score", -1), ("reading_started", -1)], **BOOK_SORTS}
+    if sort is None:
+        sort = "relevance" if search else "date_desc"
+    if sort not in sort_options or (sort == "relevance" and not search):
+        sort = "date_desc"
+    # _id breaks ties so every row has a unique position for the cursor
+    sort_by = with_tiebreaker(sort_options[sort])
+    projection = field_projection(selected, sort_by)
+
+    # Fetch books and total in one round trip
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort, len(sort_by))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            )
 
-    # Count total
-    total = await db.books.count_documents(query)
+        books, total = await find_page(
+            db.books,
+            query,
+            sort_by,
+            limit + 1,
+            seek=keyset_filter(sort_by, after),
+            stages=stages,
+            projection=projection,
+        )
+        has_next = len(books) > limit
+        books = books[:limit]
+        has_prev = True
+    else:
+        books, total = await find_page(
+            db.books,
+            query,
+            sort_by,
+            limit,
+            skip=(page - 1) * limit,
+            stages=stages,
+            projection=projection,
+        )
+        has_next = page < math.ceil(total / limit)
+        has_prev = page > 1
 
-    # Calculate pagination
-    skip = (page - 1) * limit
     pages = math.ceil(total / limit)
 
-    # Fetch books
-    cursor = db.books.find(query).sort(sort_by).skip(skip).limit(limit)
-    books = await cursor.to_list(length=limit)
+    next_cursor = None
+    if has_next and books:
+        next_cursor = encode_cursor(sort, cursor_values(books[-1], sort_by))
 
-    return {
-        "books": [serialize_book(book) for book in books],
+    return FastJSONResponse({
+        "books": [serialize_book(book, selected) for book in books],
         "total": total,
         "page": page,
         "pages": pages,
-        "has_next": page < pages,
-        "has_prev": page > 1,
-    }
+        "has_next": has_next,
+        "has_prev": has_prev,
+        "next_cursor": next_cursor,
+    }, headers=etag_headers(etag))
 
 
 @router.get("/favorites", response_model=BooksListResponse)
 async def list_favorite_books(
+    request: Request,
     page: int = Query(1, gt=0),
     limit: int = Query(20, gt=0, le=100),
-    current_user: dict = Depends(get_current_active_user),
+    fields: str | None = Query(None, description="Comma-separated subset, e.g. title,author,cover_image,rating"),
+    current_user: dict = Depends(get_current_principal),
 ):
     """List user's favorite books"""
 
-    query = {"user_id": current_user["_id"], "is_favorite": True}
-
-    total = await db.books.count_documents(query)
-    skip = (page - 1) * limit
-    pages = math.ceil(total / limit)
+    etag, not_modified = await check_etag(request, current_user["_id"])
+    if not_modified:
+        return not_modified
 
-    cursor = (
-        db.books.find(query).sort([("reading_started", -1)]).skip(skip).limit(limit)
+    selected = parse_fields(fields, BOOK_FIELDS)
+    query = {"user_id": current_user["_id"], "is_favorite": True}
+    sort_by = [("reading_started", -1)]
+
+    books, total = await find_page(
+        db.books,
+        query,
+        sort_by,
+        limit,
+        skip=(page - 1) * limit,
+        projection=field_projection(selected, sort_by),
     )
-    books = await cursor.to_list(length=limit)
+    pages = math.ceil(total / limit)
 
-    return {
-        "books": [serialize_book(book) for book in books],
+    return FastJSONResponse({
+        "books": [serialize_book(book, selected) for book in books],
         "total": total,
         "page": page,
         "pages": pages,
         "has_next": page < pages,
         "has_prev": page > 1,
-    }
+    }, headers=etag_headers(etag))
+
+
+@router.get("/suggest", response_model=BookSuggestionsResponse)
+async def suggest_books(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, gt=0, le=20),
+    current_user: dict = Depends(get_current_principal),
+):
+    """
+    Type-ahead suggestions from the user's titles, authors and genres
+
+    Served from an in-memory trigram index (built on first use per worker),
+    so keystrokes never reach MongoDB once the index is warm.
+    """
+    index = await suggest_indexes.get(current_user["_id"])
+    return {"query": q, "suggestions": index.query(q, limit)}
+
+
+@router.get("/batch", response_model=BookBatchResponse)
+async def get_books_batch(
+    request: Request,
+    ids: str = Query(..., description=f"Comma-separated book ids, at most {BATCH_MAX_IDS}"),
+    fields: str | None = Query(None, description="Comma-separated subset, e.g. title,author,cover_image"),
+    current_user: dict = Depends(get_current_principal),
+):
+    """
+    Several books by id in one request
+
+    One `$in` query on `_id` scoped to the user; books come back in the
+    order their ids were given (duplicates once), and ids that are
+    malformed, deleted or belong to someone else are listed in `missing`.
+    """
+    requested = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No book ids given"
+        )
+    if len(requested) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_MAX_IDS} ids per request",
+        )
+
+    selected = parse_fields(fields, BOOK_FIELDS)
+
+    etag, not_modified = await check_etag(request, current_user["_id"])
+    if not_modified:
+        return not_modified
+
+    object_ids = [ObjectId(i) for i in requested if ObjectId.is_valid(i)]
+    found = {}
+    if object_ids:
+        books = await db.books.find(
+            {"_id": {"$in": object_ids}, "user_id": current_user["_id"]},
+            field_projection(selected, []),
+        ).to_list(length=len(object_ids))
+        found = {str(book["_id"]): book for book in books}
+
+    return FastJSONResponse({
+        "books": [serialize_book(found[i], selected) for i in requested if i in found],
+        "missing": [i for i in requested if i not in found],
+    }, headers=etag_headers(etag))
+
+
+@router.get("/changes", response_model=BookChangesResponse)
+async def book_changes(
+    since: str | None = Query(None, description="next_since from the previous sync; omit for a full load"),
+    limit: int = Query(500, gt=0, le=1000),
+    current_user: dict = Depends(get_current_principal),
+):
+    """
+    Books created, updated or deleted since a sync token
+
+    Keep requesting with `next_since` while `has_more` is true; the final
+    page carries the deleted ids. A token older than the tombstone
+    retention window is answered with 410 and the client reloads.
+    """
+    changes = await changes_since("books", current_user["_id"], since, limit)
+
+    return FastJSONResponse({
+        "books": [serialize_book(book) for book in changes["changed"]],
+        "deleted": changes["deleted"],
+        "next_since": changes["next_since"],
+        "has_more": changes["has_more"],
+    })
 
 
 @router.get("/stats", response_model=BookStatsResponse)
-async def get_book_stats(current_user: dict = Depends(get_current_active_user)):
+async def get_book_stats(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_principal),
+):
     """Get user's reading statistics"""
 
+    # Trends compare calendar months, so the month is part of the ETag
+    now = datetime.now(timezone.utc)
+    etag, not_modified = await check_etag(request, current_user["_id"], scope=now.strftime("%Y-%m"))
+    if not_modified:
+        return not_modified
+    response.headers.update(etag_headers(etag))
+
     pipeline = [
         {"$match": {"user_id": current_user["_id"]}},
         {
@@ -240,20 +570,19 @@ async def get_book_stats(current_user: dict = Depends(get_current_active_user)):
     genres = await db.books.aggregate(genre_pipeline).to_list(length=None)
     books_by_genre = {g["_id"]: g["count"] for g in genres}
 
-    # Get books by year
+    # Get books by year (covered by the (user_id, reading_year) index)
     year_pipeline = [
         {"$match": {"user_id": current_user["_id"]}},
-        {"$group": {"_id": {"$year": "$reading_started"}, "count": {"$sum": 1}}},
+        {"$group": {"_id": "$reading_year", "count": {"$sum": 1}}},
         {"$sort": {"_id": -1}},
     ]
     years = await db.books.aggregate(year_pipeline).to_list(length=None)
-    books_by_year = {str(y["_id"]): y["count"] for y in years}
+    books_by_year = {str(y["_id"]): y["count"] for y in years if y["_id"] is not None}
 
     # Get wishlist count
     wishlist_count = await db.wishlist.count_documents({"user_id": current_user["_id"]})
 
     # ── Monthly trends (this month vs last month) ─────────────────────────
-    now = datetime.now(timezone.utc)
     this_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     if this_month_start.month == 1:
         last_month_start = this_month_start.replace(year=this_month_start.year - 1, month=12)
@@ -326,11 +655,16 @@ async def get_book_stats(current_user: dict = Depends(get_current_active_user)):
 
 @router.get("/{book_id}", response_model=BookResponse)
 async def get_book(
+    request: Request,
     book_id: str,
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Get a single book by ID"""
 
+    etag, not_modified = await check_etag(request, current_user["_id"])
+    if not_modified:
+        return not_modified
+
     try:
         book = await db.books.find_one(
             {"_id": ObjectId(book_id), "user_id": current_user["_id"]}
@@ -341,7 +675,7 @@ async def get_book(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
             )
 
-        return serialize_book(book)
+        return FastJSONResponse(serialize_book(book), headers=etag_headers(etag))
 
     except Exception as e:
         raise HTTPException(
@@ -353,21 +687,11 @@ async def get_book(
 async def update_book(
     book_id: str,
     book_data: BookUpdateRequest,
-    current_user: dict = Depends(get_current_active_user),
+    current_user: dict = Depends(get_current_principal),
 ):
     """Update a book"""
 
     try:
-        # Check book exists and belongs to user
-        existing_book = await db.books.find_one(
-            {"_id": ObjectId(book_id), "user_id": current_user["_id"]}
-        )
-
-        if not existing_book:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
-            )
-
         update_data = {
             k: v for k, v in book_data.model_dump(exclude_unset=True).items() if v is not None
         }
@@ -380,13 +704,34 @@ async def update_book(
 
         update_data["updated_at"] = datetime.now(timezone.utc)
 
-        # Update book
-        await db.books.update_one({"_id": ObjectId(book_id)}, {"$set": update_data})
+        # Ownership check, write and read-back in one round trip
+        updated_book = await db.books.find_one_and_update(
+            {"_id": ObjectId(book_id), "user_id": current_user["_id"]},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if not updated_book:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+            )
 
-        # Fetch updated book
-        updated_book = await db.books.find_one({"_id": ObjectId(book_id)})
+        # Derived search fields also depend on fields this request didn't
+        # send, so they follow from the updated document (only when stale).
+        # Matching updated_at leaves a newer concurrent edit to set its own.
+        if BOOK_INDEX_SOURCES & update_data.keys():
+            stale = stale_index_fields(updated_book, book_index_fields)
+            if stale:
+                await db.books.update_one(
+                    {"_id": updated_book["_id"], "updated_at": updated_book["updated_at"]},
+                    {"$set": stale},
+                )
+                updated_book.update(stale)
+            suggest_indexes.book_saved(current_user["_id"], updated_book)
 
-        return serialize_book(updated_book)
+        await bump_library_version(current_user["_id"])
+
+        return FastJSONResponse(serialize_book(updated_book))
 
     except HTTPException:
         raise
@@ -397,7 +742,7 @@ async def update_book(
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_book(
     book_id: str,
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Delete a book"""
 
@@ -421,6 +766,9 @@ async def delete_book(
 
         # Delete book
         await db.books.delete_one({"_id": ObjectId(book_id)})
+        suggest_indexes.book_deleted(current_user["_id"], book_id)
+        await record_deletions(current_user["_id"], "books", [book["_id"]])
+        await bump_library_version(current_user["_id"])
 
         return None
 
@@ -435,37 +783,34 @@ async def delete_book(
 @router.patch("/{book_id}/favorite", response_model=BookResponse)
 async def toggle_favorite(
     book_id: str,
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Toggle book favorite status"""
 
     try:
-        book = await db.books.find_one(
-            {"_id": ObjectId(book_id), "user_id": current_user["_id"]}
+        # Pipeline update flips the stored value atomically, so concurrent
+        # toggles never both read the same old value
+        updated_book = await db.books.find_one_and_update(
+            {"_id": ObjectId(book_id), "user_id": current_user["_id"]},
+            [
+                {
+                    "$set": {
+                        "is_favorite": {"$not": ["$is_favorite"]},
+                        "updated_at": datetime.now(timezone.utc),
+                    }
+                }
+            ],
+            return_document=ReturnDocument.AFTER,
         )
 
-        if not book:
+        if not updated_book:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
             )
 
-        # Toggle favorite
-        new_favorite_status = not book.get("is_favorite", False)
-
-        await db.books.update_one(
-            {"_id": ObjectId(book_id)},
-            {
-                "$set": {
-                    "is_favorite": new_favorite_status,
-                    "updated_at": datetime.now(timezone.utc),
-                }
-            },
-        )
-
-        # Fetch updated book
-        updated_book = await db.books.find_one({"_id": ObjectId(book_id)})
+        await bump_library_version(current_user["_id"])
 
-        return serialize_book(updated_book)
+        return FastJSONResponse(serialize_book(updated_book))
 
     except HTTPException:
         raise
@@ -478,47 +823,40 @@ async def toggle_favorite(
 @router.post("/{book_id}/cover-image", response_model=BookResponse)
 async def upload_cover_image(
     book_id: str,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(None),
-    current_user: dict = Depends(get_current_active_user),
+    current_user: dict = Depends(get_current_principal),
 ):
     """Upload book cover image"""
 
     try:
-        # Check book exists
-        book = await db.books.find_one(
-            {"_id": ObjectId(book_id), "user_id": current_user["_id"]}
+        book_filter = {"_id": ObjectId(book_id), "user_id": current_user["_id"]}
+
+        # Upload new image
+        image_url = await upload_book_cover(file)
+
+        # Ownership check and write in one round trip; the previous document
+        # tells us which old cover to remove
+        updates = {"cover_image": image_url, "updated_at": datetime.now(timezone.utc)}
+        book = await db.books.find_one_and_update(
+            book_filter, {"$set": updates}, return_document=ReturnDocument.BEFORE
         )
 
         if not book:
+            # Background tasks don't run on error responses, so clean up now
+            await _delete_covers([image_url])
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
             )
 
-        # Delete old image if exists
+        # Delete old image once nothing points at it, off the request path
         if book.get("cover_image"):
-            try:
-                await delete_cloudinary_image(book["cover_image"])
-            except Exception as e:
-                print(f"Failed to delete old image: {e}")
-
-        # Upload new image
-        image_url = await upload_book_cover(file)
-
-        # Update book
-        await db.books.update_one(
-            {"_id": ObjectId(book_id)},
-            {
-                "$set": {
-                    "cover_image": image_url,
-                    "updated_at": datetime.now(timezone.utc),
-                }
-            },
-        )
+            background_tasks.add_task(_delete_covers, [book["cover_image"]])
 
-        # Fetch updated book
-        updated_book = await db.books.find_one({"_id": ObjectId(book_id)})
+        updated_book = {**book, **updates}
+        await bump_library_version(current_user["_id"])
 
-        return serialize_book(updated_book)
+        return FastJSONResponse(serialize_book(updated_book))
 
     except HTTPException:
         raise
@@ -526,57 +864,86 @@ async def upload_cover_image(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@router.get("/{book_id}/next", response_model=BookResponse)
-async def get_next_book(
+@router.get("/{book_id}/neighbors", response_model=BookNeighborsResponse)
+async def get_book_neighbors(
+    request: Request,
     book_id: str,
-    current_user: dict = Depends(get_current_active_user)
+    sort: str = Query("date_desc", description=", ".join(BOOK_SORTS)),
+    wrap: bool = Query(False, description="Continue from the other end of the list"),
+    fields: str | None = Query(None, description="Comma-separated subset, e.g. title,cover_image"),
+    current_user: dict = Depends(get_current_principal),
 ):
-    """Get the next book in the user's library"""
-
-    try:
-        # Get current book
-        current_book = await db.books.find_one(
-            {"_id": ObjectId(book_id), "user_id": current_user["_id"]}
+    """
+    Previous and next book around a book in any list order
+
+    Two keyset seeks on the sort's (user_id, key, _id) index, sent as one
+    aggregation, so the cost doesn't grow with the library and books
+    sharing a sort key are each visited exactly once.
+    """
+    if sort not in BOOK_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sort '{sort}'. Allowed: {', '.join(BOOK_SORTS)}",
+        )
+    if not ObjectId.is_valid(book_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid book ID"
         )
 
-        if not current_book:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
-            )
+    selected = parse_fields(fields, BOOK_FIELDS)
+    sort_by = with_tiebreaker(BOOK_SORTS[sort])
 
-        # Find next book (by reading_started date, descending)
-        next_book = await db.books.find_one(
-            {
-                "user_id": current_user["_id"],
-                "_id": {"$ne": ObjectId(book_id)},
-                "reading_started": {"$gt": current_book["reading_started"]}
-            },
-            sort=[("reading_started", 1)]
+    # Same check as check_etag, keeping the version for the order cache key
+    version = await get_library_version(current_user["_id"])
+    etag = make_etag(request, current_user["_id"], version)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+    neighbors = await find_neighbors(
+        current_user["_id"], ObjectId(book_id), sort, sort_by, version,
+        wrap=wrap, projection=field_projection(selected, sort_by),
+    )
+    if neighbors is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
 
-        # If no next book found, get the first book (wrap around)
-        if not next_book:
-            next_book = await db.books.find_one(
-                {
-                    "user_id": current_user["_id"],
-                    "_id": {"$ne": ObjectId(book_id)}
-                },
-                sort=[("reading_started", 1)]
-            )
+    previous, following = neighbors
+    return FastJSONResponse({
+        "id": book_id,
+        "sort": sort,
+        "previous": serialize_book(previous, selected) if previous else None,
+        "next": serialize_book(following, selected) if following else None,
+    }, headers=etag_headers(etag))
 
-        if not next_book:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail="No other books in library"
-            )
 
-        return serialize_book(next_book)
+@router.get("/{book_id}/next", response_model=BookResponse)
+async def get_next_book(
+    book_id: str,
+    current_user: dict = Depends(get_current_principal)
+):
+    """Get the next book in the user's library (by reading_started, wrapping around)"""
 
-    except HTTPException:
-        raise
+    if not ObjectId.is_valid(book_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid book ID"
+        )
 
-    except Exception as e:
+    neighbors = await find_neighbors(
+        current_user["_id"], ObjectId(book_id), "date_asc",
+        with_tiebreaker(BOOK_SORTS["date_asc"]), wrap=True,
+    )
+
+    if neighbors is None:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
-    
\ No newline at end of file
+
+    next_book = neighbors[1]
+    if not next_book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No other books in library"
+        )
+
+    return FastJSONResponse(serialize_book(next_book))
@@ -7,7 +7,11 @@ import json
 
 from app.core.database import db
 from app.core.dependencies import get_current_active_user
+from app.core.library_version import bump_library_version
+from app.core.suggest import suggest_indexes
 from app.utils.file_handlers import JSONHandler, CSVHandler
+from app.utils.indexing import book_index_fields, wishlist_index_fields
+from app.utils.responses import dumps
 
 
 router = APIRouter(tags=["Data Import/Export"])
@@ -135,13 +139,7 @@ async def export_selective(
     }
 
     # ── Stream response ───────────────────────────────────────────────────────
-    def datetime_handler(obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return str(obj)
-
-    json_content = json.dumps(export_data, indent=2, ensure_ascii=False, default=datetime_handler)
-    buffer = BytesIO(json_content.encode("utf-8"))
+    buffer = BytesIO(dumps(export_data, indent=True))
     username = current_user.get("user_name", "user")
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"{username}_export_{timestamp}.json"
@@ -256,6 +254,7 @@ async def import_data(
                     book["user_id"] = current_user["_id"]
                     book["created_at"] = datetime.now(timezone.utc)
                     book["updated_at"] = datetime.now(timezone.utc)
+                    book.update(book_index_fields(book))
                     valid_books.append(book)
                 except (ValueError, Exception) as e:
                     book_errors.append({"row": idx, "error": str(e)})
@@ -264,6 +263,8 @@ async def import_data(
             if valid_books:
                 result = await db.books.insert_many(valid_books)
                 imported_books = len(result.inserted_ids)
+                suggest_indexes.invalidate(current_user["_id"])
+                await bump_library_version(current_user["_id"])
 
             dup_count = sum(1 for e in book_errors if "Duplicate" in e.get("error", ""))
             results["sections"]["books"] = {
@@ -344,6 +345,7 @@ async def import_data(
                         "created_at": datetime.now(timezone.utc),
                         "updated_at": datetime.now(timezone.utc),
                     }
+                    item.update(wishlist_index_fields(item))
                     valid_items.append(item)
                 except Exception as e:
                     wish_errors.append({"row": idx, "error": str(e)})
@@ -352,6 +354,7 @@ async def import_data(
             if valid_items:
                 result = await db["wishlist"].insert_many(valid_items)
                 imported_wish = len(result.inserted_ids)
+                await bump_library_version(current_user["_id"])
 
             dup_count = sum(1 for e in wish_errors if "Duplicate" in e.get("error", ""))
             results["sections"]["wishlist"] = {
@@ -393,12 +396,15 @@ async def _insert_books_and_respond(valid_books, errors, current_user):
         book["user_id"] = current_user["_id"]
         book["created_at"] = datetime.now(timezone.utc)
         book["updated_at"] = datetime.now(timezone.utc)
+        book.update(book_index_fields(book))
         books_to_insert.append(book)
 
     imported_count = 0
     if books_to_insert:
         result = await db.books.insert_many(books_to_insert)
         imported_count = len(result.inserted_ids)
+        suggest_indexes.invalidate(current_user["_id"])
+        await bump_library_version(current_user["_id"])
 
     duplicate_errors = [e for e in errors if "Duplicate" in e.get("error", "")]
     real_errors = [e for e in errors if "Duplicate" not in e.get("error", "")]
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, UploadFile, HTTPException, status, Depends, File
+from fastapi import APIRouter, UploadFile, HTTPException, Response, status, Depends, File
 from datetime import datetime, timezone
 
 from app.core.cloudinary import upload_profile_picture, delete_cloudinary_image
 from app.core.database import db
-from app.core.dependencies import get_current_active_user
-from app.core.security import get_password_hash, verify_password
+from app.repositories.users import user_repository
+from app.core.dependencies import bump_token_version, get_current_active_user, invalidate_user_cache, revoke_user_tokens
+from app.core.suggest import suggest_indexes
+from app.core.sync import record_deletions
+from app.core.hashing import password_pool
+from app.core.security import access_token_claims, create_access_token, create_refresh_token
 from app.schemas.user import UserResponse, UserUpdateRequest, ChangePasswordRequest
+from app.utils.responses import FastJSONResponse
 
 
 router = APIRouter(prefix="/me", tags=["Users"])
@@ -37,7 +42,7 @@ def serialize_user(user: dict) -> dict:
 @router.get("/", response_model=UserResponse)
 async def get_profile(current_user: dict = Depends(get_current_active_user)):
     """Get user profile"""
-    return serialize_user(current_user)
+    return FastJSONResponse(serialize_user(current_user))
 
 
 @router.put("/", response_model=UserResponse)
@@ -61,16 +66,11 @@ async def update_profile(
     
     update_fields["updated_at"] = datetime.now(timezone.utc)
     
-    # Update user
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
-        {"$set": update_fields}
-    )
-    
-    # Fetch updated user
-    updated_user = await db.users.find_one({"_id": current_user["_id"]})
+    # Update user and read it back in one round trip
+    updated_user = await user_repository.update_and_get(current_user["_id"], update_fields)
+    invalidate_user_cache(current_user["_id"])
     
-    return serialize_user(updated_user)
+    return FastJSONResponse(serialize_user(updated_user))
 
 
 @router.post("/picture", response_model=UserResponse)
@@ -90,21 +90,17 @@ async def upload_profile_picture(
     # Upload new picture
     image_url = await upload_profile_picture(file)
     
-    # Update user
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
+    # Update user and read it back in one round trip
+    updated_user = await user_repository.update_and_get(
+        current_user["_id"],
         {
-            "$set": {
-                "profile_picture": image_url,
-                "updated_at": datetime.now(timezone.utc)
-            }
+            "profile_picture": image_url,
+            "updated_at": datetime.now(timezone.utc)
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
-    # Fetch updated user
-    updated_user = await db.users.find_one({"_id": current_user["_id"]})
-    
-    return serialize_user(updated_user)
+    return FastJSONResponse(serialize_user(updated_user))
 
 
 @router.delete("/picture")
@@ -126,15 +122,14 @@ async def delete_profile_picture(
         print(f"Failed to delete image: {e}")
     
     # Update user
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
+    await user_repository.update(
+        current_user["_id"],
         {
-            "$set": {
-                "profile_picture": None,
-                "updated_at": datetime.now(timezone.utc)
-            }
+            "profile_picture": None,
+            "updated_at": datetime.now(timezone.utc)
         }
     )
+    invalidate_user_cache(current_user["_id"])
     
     return {"message": "Profile picture deleted"}
 
@@ -142,29 +137,49 @@ async def delete_profile_picture(
 @router.put("/password")
 async def change_password(
         password_data: ChangePasswordRequest,
+        response: Response,
         current_user: dict = Depends(get_current_active_user)
 ):
-    """Change user password"""
+    """Change user password, signing out every other session"""
+
+    # The principal never carries the hash; fetch only that field
+    stored = await user_repository.get_by_id(current_user["_id"], user_repository.PASSWORD)
 
     # Verify current password
-    if not verify_password(password_data.current_password, current_user["password"]):
+    if not stored or not await password_pool.verify(password_data.current_password, stored["password"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
 
-    # Update password
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
+    hashed_password = await password_pool.hash(password_data.new_password)
+
+    # Update password and revoke every token issued under the old one
+    version = await bump_token_version(
+        current_user["_id"],
         {
-            "$set": {
-                "password": get_password_hash(password_data.new_password),
-                "updated_at": datetime.now(timezone.utc)
-            }
+            "password": hashed_password,
+            "updated_at": datetime.now(timezone.utc)
         }
     )
 
-    return {"message": "Password changed successfully"}
+    # This session continues with tokens carrying the new version
+    user = {**current_user, "token_version": version}
+    response.set_cookie(
+        key="refresh_token",
+        value=create_refresh_token(data={"sub": str(user["_id"]), "ver": version}),
+        httponly=True,
+        secure=True,
+        samesite="lax",
+        max_age=7 * 24 * 60 * 60
+    )
+
+    return {
+        "message": "Password changed successfully",
+        "access_token": create_access_token(data=access_token_claims(user)),
+        "token_type": "bearer",
+        "expires_in": 3600,
+    }
 
 
 @router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
@@ -173,8 +188,12 @@ async def delete_account(
 ):
     """Delete user account and all associated data"""
     
-    # Delete all user's books
-    await db.books.delete_many({"user_id": current_user["_id"]})
+    # Delete all user's books and wishlist items, leaving sync tombstones
+    for collection in ("books", "wishlist"):
+        ids = await db[collection].distinct("_id", {"user_id": current_user["_id"]})
+        await db[collection].delete_many({"user_id": current_user["_id"]})
+        await record_deletions(current_user["_id"], collection, ids)
+    suggest_indexes.invalidate(current_user["_id"])
     
     # Delete profile picture if exists
     if current_user.get("profile_picture"):
@@ -184,6 +203,7 @@ async def delete_account(
             print(f"Failed to delete profile picture: {e}")
     
     # Delete user
-    await db.users.delete_one({"_id": current_user["_id"]})
+    await user_repository.delete(current_user["_id"])
+    revoke_user_tokens(current_user["_id"])
     
     return None
\ No newline at end of file
@@ -1,44 +1,72 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime, timezone
+from decimal import Decimal
 import math
 
 from app.core.database import db
-from app.core.dependencies import get_current_active_user
+from app.core.dependencies import get_current_principal
+from app.core.library_version import bump_library_version, check_etag, etag_headers
+from app.core.suggest import suggest_indexes
+from app.core.sync import changes_since, record_deletions
+from app.utils.indexing import (
+    WISHLIST_INDEX_SOURCES,
+    book_index_fields,
+    stale_index_fields,
+    wishlist_index_fields,
+)
+from app.utils.listing import field_projection, find_page, parse_fields
+from app.utils.responses import FastJSONResponse
+from app.utils.search import prefix_filter, relevance_stage, search_filter
 from app.schemas.wishlist import (
+    WishlistChangesResponse,
     WishlistCreateRequest,
     WishlistUpdateRequest,
     WishlistResponse,
     WishlistListResponse,
+    WishlistPartialResponse,
 )
 
 
 router = APIRouter(tags=["Wishlist"])
 
 
+# Fields a list request may select with `fields=` (id is always returned)
+WISHLIST_FIELDS = frozenset(WishlistPartialResponse.model_fields) - {"id"}
+
+
 # Helper function to serialize wishlist item
-def serialize_wishlist(item: dict) -> dict:
-    """Convert MongoDB document to WishlistResponse format"""
-    return {
+def serialize_wishlist(item: dict, fields: list[str] | None = None) -> dict:
+    """
+    Convert MongoDB document to WishlistResponse format
+
+    With `fields` only `id` plus those fields are returned.
+    """
+    data = {
         "id": str(item["_id"]),
-        "title": item["title"],
+        "title": item.get("title"),
         "author": item.get("author"),
         "isbn": item.get("isbn"),
         "genre": item.get("genre"),
         "priority": item.get("priority", 1),
         "notes": item.get("notes"),
-        "price": item.get("price"),
+        "price": Decimal(str(item["price"])) if item.get("price") is not None else None,
         "acquisition_type": item.get("acquisition_type", "buy_online"),
         "where_to_buy": item.get("where_to_buy"),
         "borrowed_from": item.get("borrowed_from"),
-        "created_at": item["created_at"],
-        "updated_at": item["updated_at"],
+        "created_at": item.get("created_at"),
+        "updated_at": item.get("updated_at"),
     }
 
+    if fields is not None:
+        return {"id": data["id"], **{field: data[field] for field in fields}}
+    return data
+
 
 @router.post("/", response_model=WishlistResponse, status_code=status.HTTP_201_CREATED)
 async def create_wishlist_item(
-    item_data: WishlistCreateRequest, current_user: dict = Depends(get_current_active_user)
+    item_data: WishlistCreateRequest, current_user: dict = Depends(get_current_principal)
 ):
     """Add a new book to wishlist"""
 
@@ -58,8 +86,10 @@ async def create_wishlist_item(
         "created_at": datetime.now(timezone.utc),
         "updated_at": datetime.now(timezone.utc),
     }
+    new_item.update(wishlist_index_fields(new_item))
 
     result = await db["wishlist"].insert_one(new_item)
+    await bump_library_version(current_user["_id"])
 
     # Fetch created item
     created_item = await db["wishlist"].find_one({"_id": result.inserted_id})
@@ -69,69 +99,107 @@ async def create_wishlist_item(
 
 @router.get("/", response_model=WishlistListResponse)
 async def list_wishlist(
+    request: Request,
     genre: str | None = Query(None),
     priority: int | None = Query(None, ge=1, le=5),
     search: str | None = Query(None),
-    sort: str = Query("priority_desc"),
+    sort: str | None = Query(None),
     page: int = Query(1, gt=0),
     limit: int = Query(20, gt=0, le=100),
-    current_user: dict = Depends(get_current_active_user),
+    fields: str | None = Query(None, description="Comma-separated subset, e.g. title,author,priority"),
+    current_user: dict = Depends(get_current_principal),
 ):
     """List user's wishlist with filters and pagination"""
 
+    etag, not_modified = await check_etag(request, current_user["_id"])
+    if not_modified:
+        return not_modified
+
+    selected = parse_fields(fields, WISHLIST_FIELDS)
+
     # Build query
     query = {"user_id": current_user["_id"]}
 
+    # Case- and accent-insensitive prefix match on the normalized field
     if genre:
-        query["genre"] = {"$regex": genre, "$options": "i"}
+        query.update(prefix_filter("genre_norm", genre))
 
     if priority is not None:
         query["priority"] = priority
 
+    stages = []
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"author": {"$regex": search, "$options": "i"}},
-        ]
+        query.update(search_filter(search))
+        stages.append(relevance_stage(search))
 
     # Build sort
     sort_options = {
+        "relevance": [("score", -1), ("priority", -1), ("created_at", -1)],
         "date_desc": [("created_at", -1)],
         "date_asc": [("created_at", 1)],
         "priority_desc": [("priority", -1), ("created_at", -1)],
         "priority_asc": [("priority", 1), ("created_at", -1)],
-        "title_asc": [("title", 1)],
-        "title_desc": [("title", -1)],
+        "title_asc": [("title_norm", 1)],
+        "title_desc": [("title_norm", -1)],
     }
+    if sort is None:
+        sort = "relevance" if search else "priority_desc"
+    if sort == "relevance" and not search:
+        sort = "priority_desc"
     sort_by = sort_options.get(sort, [("priority", -1)])
 
-    # Count total
-    total = await db["wishlist"].count_documents(query)
+    # Fetch wishlist items and total in one round trip
+    items, total = await find_page(
+        db["wishlist"],
+        query,
+        sort_by,
+        limit,
+        skip=(page - 1) * limit,
+        stages=stages,
+        projection=field_projection(selected, sort_by),
+    )
 
     # Calculate pagination
-    skip = (page - 1) * limit
     pages = math.ceil(total / limit) if total > 0 else 1
 
-    # Fetch wishlist items
-    cursor = db["wishlist"].find(query).sort(sort_by).skip(skip).limit(limit)
-    items = await cursor.to_list(length=limit)
-
-    return {
-        "wishlist": [serialize_wishlist(item) for item in items],
+    return FastJSONResponse({
+        "wishlist": [serialize_wishlist(item, selected) for item in items],
         "total": total,
         "page": page,
         "pages": pages,
         "has_next": page < pages,
         "has_prev": page > 1,
-    }
+    }, headers=etag_headers(etag))
+
+
+@router.get("/changes", response_model=WishlistChangesResponse)
+async def wishlist_changes(
+    since: str | None = Query(None, description="next_since from the previous sync; omit for a full load"),
+    limit: int = Query(500, gt=0, le=1000),
+    current_user: dict = Depends(get_current_principal),
+):
+    """Wishlist items created, updated or deleted since a sync token"""
+
+    changes = await changes_since("wishlist", current_user["_id"], since, limit)
+
+    return FastJSONResponse({
+        "wishlist": [serialize_wishlist(item) for item in changes["changed"]],
+        "deleted": changes["deleted"],
+        "next_since": changes["next_since"],
+        "has_more": changes["has_more"],
+    })
 
 
 @router.get("/{item_id}", response_model=WishlistResponse)
 async def get_wishlist_item(
-    item_id: str, current_user: dict = Depends(get_current_active_user)
+    request: Request, item_id: str, current_user: dict = Depends(get_current_principal)
 ):
     """Get a single wishlist item by ID"""
 
+    etag, not_modified = await check_etag(request, current_user["_id"])
+    if not_modified:
+        return not_modified
+
     try:
         item = await db["wishlist"].find_one(
             {"_id": ObjectId(item_id), "user_id": current_user["_id"]}
@@ -142,7 +210,7 @@ async def get_wishlist_item(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist item not found"
             )
 
-        return serialize_wishlist(item)
+        return FastJSONResponse(serialize_wishlist(item), headers=etag_headers(etag))
 
     except Exception as e:
         raise HTTPException(
@@ -154,21 +222,11 @@ async def get_wishlist_item(
 async def update_wishlist_item(
     item_id: str,
     item_data: WishlistUpdateRequest,
-    current_user: dict = Depends(get_current_active_user),
+    current_user: dict = Depends(get_current_principal),
 ):
     """Update a wishlist item"""
 
     try:
-        # Check item exists and belongs to user
-        existing_item = await db["wishlist"].find_one(
-            {"_id": ObjectId(item_id), "user_id": current_user["_id"]}
-        )
-
-        if not existing_item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist item not found"
-            )
-
         # Build update data — keep fields that were explicitly sent (even if None/0)
         raw_data = item_data.model_dump(exclude_unset=True)
         update_data = {}
@@ -186,22 +244,49 @@ async def update_wishlist_item(
                 detail="No data to update"
             )
 
-        # Clean up conditional fields based on acquisition_type
-        acq_type = update_data.get("acquisition_type", existing_item.get("acquisition_type"))
-        if acq_type != "buy_online":
-            update_data.setdefault("where_to_buy", None)
-        if acq_type != "borrowed":
-            update_data.setdefault("borrowed_from", None)
-
         update_data["updated_at"] = datetime.now(timezone.utc)
 
-        # Update item
-        await db["wishlist"].update_one({"_id": ObjectId(item_id)}, {"$set": update_data})
+        # Pipeline update: sent values are set as literals (a note may start
+        # with "$"), then conditional fields that weren't sent are cleared
+        # against the resulting acquisition_type, all without a prior read
+        cleanup = {}
+        if "where_to_buy" not in update_data:
+            cleanup["where_to_buy"] = {
+                "$cond": [{"$eq": ["$acquisition_type", "buy_online"]}, "$where_to_buy", None]
+            }
+        if "borrowed_from" not in update_data:
+            cleanup["borrowed_from"] = {
+                "$cond": [{"$eq": ["$acquisition_type", "borrowed"]}, "$borrowed_from", None]
+            }
+        pipeline = [{"$set": {k: {"$literal": v} for k, v in update_data.items()}}]
+        if cleanup:
+            pipeline.append({"$set": cleanup})
+
+        # Ownership check, write and read-back in one round trip
+        updated_item = await db["wishlist"].find_one_and_update(
+            {"_id": ObjectId(item_id), "user_id": current_user["_id"]},
+            pipeline,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if not updated_item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist item not found"
+            )
+
+        # Keep derived search fields in sync with the edited text
+        if WISHLIST_INDEX_SOURCES & update_data.keys():
+            stale = stale_index_fields(updated_item, wishlist_index_fields)
+            if stale:
+                await db["wishlist"].update_one(
+                    {"_id": updated_item["_id"], "updated_at": updated_item["updated_at"]},
+                    {"$set": stale},
+                )
+                updated_item.update(stale)
 
-        # Fetch updated item
-        updated_item = await db["wishlist"].find_one({"_id": ObjectId(item_id)})
+        await bump_library_version(current_user["_id"])
 
-        return serialize_wishlist(updated_item)
+        return FastJSONResponse(serialize_wishlist(updated_item))
 
     except HTTPException:
         raise
@@ -211,7 +296,7 @@ async def update_wishlist_item(
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_wishlist_item(
-    item_id: str, current_user: dict = Depends(get_current_active_user)
+    item_id: str, current_user: dict = Depends(get_current_principal)
 ):
     """Delete a wishlist item"""
 
@@ -228,6 +313,8 @@ async def delete_wishlist_item(
 
         # Delete item
         await db["wishlist"].delete_one({"_id": ObjectId(item_id)})
+        await record_deletions(current_user["_id"], "wishlist", [item["_id"]])
+        await bump_library_version(current_user["_id"])
 
         return None
 
@@ -241,7 +328,7 @@ async def delete_wishlist_item(
 
 @router.post("/{item_id}/move-to-library", response_model=dict)
 async def move_to_library(
-    item_id: str, current_user: dict = Depends(get_current_active_user)
+    item_id: str, current_user: dict = Depends(get_current_principal)
 ):
     """Move wishlist item to reading library"""
 
@@ -277,11 +364,15 @@ async def move_to_library(
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc),
         }
+        new_book.update(book_index_fields(new_book))
 
         result = await db.books.insert_one(new_book)
+        suggest_indexes.book_saved(current_user["_id"], {**new_book, "_id": result.inserted_id})
 
         # Delete from wishlist
         await db["wishlist"].delete_one({"_id": ObjectId(item_id)})
+        await record_deletions(current_user["_id"], "wishlist", [item["_id"]])
+        await bump_library_version(current_user["_id"])
 
         return {
             "message": "Book moved to library successfully",
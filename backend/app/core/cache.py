@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+import time
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry
+
+    Entries expire after `ttl` seconds (or a per-entry ttl passed to `set`),
+    and the least recently used entry is evicted once `max_size` is reached.
+    A `max_size` of 0 disables the cache entirely.
+
+    The cache lives in a single worker process, so it is only as fresh as
+    the invalidations that reach that process; keep TTLs short for data
+    that can change from another worker.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value, or `default` on a miss or expired entry"""
+        entry = self._data.get(key, _MISSING)
+
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """Store a value, evicting the least recently used entry when full"""
+        if not self.enabled:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return
+
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry if present"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Counters used to size the cache under real load"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     APP_NAME: str = Field(default="My Reading Journey API")
     APP_VERSION: str = Field(default="4.0.0")
     DEBUG: bool = Field(default=True)
+    METRICS_ENABLED: bool = Field(default=False)               # serve /metrics outside DEBUG (keep it off the public internet)
     
     # Security
     SECRET_KEY: SecretStr
@@ -17,6 +18,45 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60)
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=30)
     
+    # Authenticated principal cache (per worker process)
+    USER_CACHE_MAX_SIZE: int = Field(default=10_000)            # 0 disables the cache
+    USER_CACHE_TTL_SECONDS: int = Field(default=30)
+    
+    # Stateless access tokens: trust the verified/active claims while the
+    # token_version claim matches the in-memory version table
+    STATELESS_ACCESS_TOKENS: bool = Field(default=False)
+    TOKEN_VERSION_TABLE_SIZE: int = Field(default=100_000)
+    TOKEN_VERSION_TTL_SECONDS: int = Field(default=60)
+    
+    # Verified access-token claims cached until the token's exp
+    JWT_DECODE_CACHE_SIZE: int = Field(default=10_000)         # 0 disables the cache
+    
+    # Dedicated bcrypt process pool (per worker process)
+    BCRYPT_POOL_WORKERS: int = Field(default=0)                # 0 = os.cpu_count()
+    BCRYPT_QUEUE_SIZE: int = Field(default=32)                 # waiting hashes before 503
+    BCRYPT_RETRY_AFTER_SECONDS: int = Field(default=2)
+    
+    # bcrypt cost: pinned rounds, or calibrated at startup to a target latency
+    BCRYPT_ROUNDS: int = Field(default=0)                      # 0 = calibrate
+    BCRYPT_TARGET_MS: int = Field(default=150)                 # 0 = passlib default cost
+    BCRYPT_MIN_ROUNDS: int = Field(default=10)
+    BCRYPT_MAX_ROUNDS: int = Field(default=16)
+    
+    # Login throttle (sliding window, checked before bcrypt runs)
+    LOGIN_THROTTLE_ENABLED: bool = Field(default=True)
+    LOGIN_THROTTLE_BACKEND: str = Field(default="memory")      # memory | mongo (shared by all workers)
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = Field(default=300)
+    LOGIN_THROTTLE_MAX_ATTEMPTS: int = Field(default=5)        # per login identifier + IP
+    LOGIN_THROTTLE_MAX_PER_IP: int = Field(default=0)          # failed logins per IP, any identifier (0 = off)
+    
+    # Reverse proxies in front of the app that append to X-Forwarded-For
+    # (0 = use the socket peer address as the client IP)
+    TRUSTED_PROXY_HOPS: int = Field(default=0)
+    
+    # Write-behind buffer for last_login
+    LAST_LOGIN_FLUSH_SECONDS: float = Field(default=5.0)
+    LAST_LOGIN_MAX_PENDING: int = Field(default=5_000)         # flush early past this many users
+    
     # Database
     MONGODB_URI: SecretStr
     MONGODB_DBNAME: SecretStr = Field(default="myreadingjourney")
@@ -34,6 +74,15 @@ class Settings(BaseSettings):
     MAIL_VALIDATE_CERTS: bool = Field(default=True)
     MAIL_SSL_TLS: bool = Field(default=False)
     
+    # Email outbox (background sender)
+    EMAIL_OUTBOX_BATCH_SIZE: int = Field(default=20)
+    EMAIL_OUTBOX_POLL_SECONDS: float = Field(default=10.0)
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = Field(default=6)
+    EMAIL_OUTBOX_BACKOFF_SECONDS: int = Field(default=30)      # doubled after every failed attempt
+    EMAIL_OUTBOX_LEASE_SECONDS: int = Field(default=120)
+    EMAIL_OUTBOX_RETENTION_DAYS: int = Field(default=7)        # sent messages kept this long
+    SMTP_IDLE_TIMEOUT_SECONDS: float = Field(default=60.0)     # keep the SMTP session open this long
+    
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: SecretStr
     CLOUDINARY_API_KEY: SecretStr
@@ -47,6 +96,21 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = Field(default=50 * 1024 * 1024)  # 50MB
     MAX_IMAGE_SIZE: int = Field(default=10 * 1024 * 1024)   # 10MB
     
+    # Type-ahead suggestions (per-worker trigram indexes)
+    SUGGEST_INDEX_MEMORY_MB: int = Field(default=64)
+    SUGGEST_INDEX_TTL_SECONDS: int = Field(default=300)        # rebuild to pick up other workers' writes
+    
+    # Delta sync (/books/changes, /wishlist/changes)
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = Field(default=30)     # older sync tokens get 410 Gone
+    SYNC_CLOCK_SKEW_SECONDS: int = Field(default=5)            # overlap between consecutive syncs
+    
+    # Book prev/next: cached ordered id lists per (user, sort, library version)
+    NEIGHBOR_ORDER_CACHE_SIZE: int = Field(default=0)          # 0 = keyset seeks only
+    NEIGHBOR_ORDER_CACHE_TTL_SECONDS: int = Field(default=300)
+    
+    # Listing
+    LIST_QUERY_MODE: str = Field(default="find")               # "find" (count + find) or "facet" (one aggregate)
+    
     # CORS
     CORS_ORIGINS: list = Field(default=["http://localhost:3000"])
     
@@ -32,9 +32,6 @@ class Database:
             
             self._db = self.client[settings.MONGODB_DBNAME.get_secret_value()]
             
-            # Create indexes
-            await self._create_indexes()
-            
             logger.info(Fore.GREEN + "Connected to MongoDB")
             
         except ConnectionFailure as e:
@@ -44,28 +41,6 @@ class Database:
             logger.error(Fore.RED + f"Database initialization error: {e}")
             raise e
     
-    async def _create_indexes(self):
-        """Create database indexes"""
-        try:
-            # Users collection indexes
-            await self._db.users.create_index("email", unique=True)
-            await self._db.users.create_index("user_name", unique=True)  # Changed from userid
-            
-            # Books collection indexes
-            await self._db.books.create_index("user_id")
-            await self._db.books.create_index([("user_id", 1), ("is_favorite", 1)])
-            await self._db.books.create_index([("user_id", 1), ("reading_started", -1)])
-            await self._db.books.create_index([("user_id", 1), ("title", 1)])
-            
-            # Wishlist collection indexes
-            await self._db.wishlist.create_index("user_id")
-            await self._db.wishlist.create_index([("user_id", 1), ("priority", -1)])
-            
-            logger.info(Fore.GREEN + "Database indexes created")
-            
-        except Exception as e:
-            logger.warning(Fore.YELLOW + f"Index creation warning: {e}")
-    
     async def close(self):
         """Close database connection"""
         if self.client:
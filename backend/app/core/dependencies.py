@@ -1,16 +1,138 @@
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
 from bson import ObjectId
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import decode_token
-from app.core.database import db
+from app.repositories.users import user_repository
 
 
 security = HTTPBearer()
 
 
+# Authenticated users keyed by user id, so a page firing several API calls
+# only pays for one users lookup. Every write to db.users must call
+# invalidate_user_cache(); the TTL bounds staleness across worker processes.
+principal_cache = TTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+# Last token_version seen for each user id. In stateless mode an access
+# token whose `ver` claim matches this table is trusted without a lookup.
+token_versions = TTLCache(
+    max_size=settings.TOKEN_VERSION_TABLE_SIZE,
+    ttl=settings.TOKEN_VERSION_TTL_SECONDS,
+)
+
+
+# Requests that cannot change data. Any other method re-reads the user's
+# token_version and status from MongoDB: a revocation (password reset,
+# account deletion) only clears the caches of the worker that handled it,
+# and other workers must not keep accepting writes from a revoked token.
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def invalidate_user_cache(user_id) -> None:
+    """Drop a cached principal after its user document changed"""
+    principal_cache.invalidate(str(user_id))
+
+
+def revoke_user_tokens(user_id) -> None:
+    """
+    Forget everything cached for a user whose token_version was bumped
+
+    Call after a write that does `$inc: {"token_version": 1}` (or deletes the
+    user) so the next request re-reads the version from the database.
+    """
+    principal_cache.invalidate(str(user_id))
+    token_versions.invalidate(str(user_id))
+
+
+async def bump_token_version(user_id, fields: dict | None = None) -> int | None:
+    """
+    Revoke every token issued to a user; returns the new version (None if no such user)
+
+    `fields` are $set in the same write, so e.g. a new password hash and
+    the revocation of tokens issued under the old one land together.
+    """
+    if fields:
+        user = await user_repository.update_and_get(
+            user_id, fields, user_repository.AUTH, inc={"token_version": 1}
+        )
+    else:
+        user = await user_repository.increment(user_id, "token_version")
+    revoke_user_tokens(user_id)
+    return user["token_version"] if user else None
+
+
+async def _load_user(user_id: str) -> dict | None:
+    """Fetch a user's profile (never the password hash) through the principal cache"""
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = await user_repository.get_by_id(user_id, user_repository.PROFILE)
+        if user is None:
+            return None
+        principal_cache.set(user_id, user)
+
+    token_versions.set(user_id, user.get("token_version", 0))
+
+    # Routes get their own copy so they can never mutate the cached entry
+    return dict(user)
+
+
+async def _fresh_auth_state(user_id: str) -> dict:
+    """The user's revocation counter and status flags read from MongoDB, bypassing every cache"""
+    state = await user_repository.get_by_id(user_id, user_repository.AUTH)
+    if state is None:
+        revoke_user_tokens(user_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    token_versions.set(user_id, state.get("token_version", 0))
+    return state
+
+
+def _access_token_payload(credentials: HTTPAuthorizationCredentials) -> dict:
+    """Decode an access token and check its type and subject"""
+    payload = decode_token(credentials.credentials)
+
+    # Verify token type
+    if payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type"
+        )
+
+    if payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
+        )
+
+    return payload
+
+
+def _check_account_status(is_verified: bool, is_active: bool) -> None:
+    """Reject unverified or deactivated accounts"""
+    # Check verification status
+    if not is_verified:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Email not verified. Please check your email.",
+        )
+
+    # Check active status
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account deactivated. Contact support.",
+        )
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict:
     """
@@ -19,46 +141,45 @@ async def get_current_user(
     Validates:
     - Token format and signature
     - Token type (must be access token)
+    - Token version (not revoked)
     - User existence
     - Email verification
     - Account active status
+
+    Reads may be served from the per-worker principal cache; writes first
+    re-read the revocation state from MongoDB (see SAFE_METHODS).
     """
     try:
-        token = credentials.credentials
-        payload = decode_token(token)
-
-        # Verify token type
-        if payload.get("type") != "access":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type"
-            )
-
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
-            )
-
-        # Get user from database
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        payload = _access_token_payload(credentials)
+        user_id = payload["sub"]
+
+        if request.method not in SAFE_METHODS:
+            state = await _fresh_auth_state(user_id)
+            cached = principal_cache.get(user_id)
+            # A stale cached profile is reloaded, so the checks below see the current state
+            if cached is not None and any(
+                cached.get(field) != state.get(field) for field in state
+            ):
+                invalidate_user_cache(user_id)
+
+        # Get user from cache or database
+        user = await _load_user(user_id)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
 
-        # Check verification status
-        if not user.get("is_verified"):
+        # Tokens issued before the last password reset / deactivation
+        if payload.get("ver", 0) < user.get("token_version", 0):
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Email not verified. Please check your email.",
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
             )
 
-        # Check active status
-        if not user.get("is_active", True):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Account deactivated. Contact support.",
-            )
+        _check_account_status(
+            user.get("is_verified", False), user.get("is_active", True)
+        )
 
         return user
 
@@ -70,6 +191,35 @@ async def get_current_user(
         )
 
 
+async def get_current_principal(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> dict:
+    """
+    Get the minimal authenticated principal (`_id` and status flags)
+
+    For routes that only scope queries by user id. With
+    STATELESS_ACCESS_TOKENS enabled, reads trust the verified/active claims
+    while the token's `ver` matches the in-memory version table, so no
+    database lookup happens. Writes, and reads without a matching entry,
+    fall back to get_current_user.
+    """
+    if settings.STATELESS_ACCESS_TOKENS and request.method in SAFE_METHODS:
+        payload = _access_token_payload(credentials)
+        user_id = payload["sub"]
+
+        if "ver" in payload and token_versions.get(user_id) == payload["ver"]:
+            _check_account_status(payload.get("vrf", False), payload.get("act", True))
+            return {
+                "_id": ObjectId(user_id),
+                "is_verified": payload.get("vrf", False),
+                "is_active": payload.get("act", True),
+                "token_version": payload["ver"],
+            }
+
+    return await get_current_user(request, credentials)
+
+
 async def get_current_active_user(
     current_user: dict = Depends(get_current_user),
 ) -> dict:
@@ -81,6 +231,7 @@ async def get_current_active_user(
 
 
 def get_optional_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
 ) -> dict | None:
     """
@@ -91,7 +242,6 @@ def get_optional_current_user(
         return None
 
     try:
-        return get_current_user(credentials)
+        return get_current_user(request, credentials)
     except HTTPException:
         return None
-    
\ No newline at end of file
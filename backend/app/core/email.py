@@ -1,24 +1,10 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from pydantic import EmailStr
-from typing import List
-from jinja2 import Template
-from app.core.config import settings
-
-
-# Email configuration
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD.get_secret_value(),
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=settings.MAIL_USE_TLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=settings.MAIL_USE_CREDENTIALS,
-    VALIDATE_CERTS=settings.MAIL_VALIDATE_CERTS,
-)
+from html.parser import HTMLParser
+from typing import Iterable, NamedTuple
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+import re
 
-fastmail = FastMail(conf)
+from app.core.config import settings
+from app.core.outbox import email_outbox
 
 
 # Email Templates
@@ -95,37 +81,152 @@ RESET_PASSWORD_TEMPLATE = """
 """
 
 
+class _PlainTextConverter(HTMLParser):
+    """Turn an HTML email (template) into a readable plaintext version"""
+
+    BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "br", "tr", "li"}
+    SKIP_TAGS = {"head", "style", "script"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: list[str] = []
+        self._skip_depth = 0
+        self._href: str | None = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+        elif tag == "a":
+            self._href = dict(attrs).get("href")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+        elif tag == "a" and self._href:
+            self._parts.append(f": {self._href}")
+            self._href = None
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def text(self) -> str:
+        lines = (re.sub(r"[ \t]+", " ", line).strip() for line in "".join(self._parts).splitlines())
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+
+def html_to_text(html: str) -> str:
+    """Plaintext rendering of an HTML document (links become `text: url`)"""
+    converter = _PlainTextConverter()
+    converter.feed(html)
+    converter.close()
+    return converter.text()
+
+
+class RenderedEmail(NamedTuple):
+    html: str
+    text: str
+
+
+class EmailTemplateRegistry:
+    """
+    Email templates compiled once in a shared Jinja environment
+
+    Each HTML template gets a plaintext twin derived from its source (the
+    `{{ ... }}` placeholders survive the conversion), so both parts of a
+    message are plain template renders. Compiled bytecode is cached on disk
+    so other workers and restarts skip the compile step too.
+    """
+
+    def __init__(self, templates: dict[str, str]):
+        sources = {}
+        for name, html in templates.items():
+            sources[f"{name}.html"] = html
+            sources[f"{name}.txt"] = html_to_text(html)
+
+        self._html_env = Environment(
+            loader=DictLoader(sources),
+            bytecode_cache=FileSystemBytecodeCache(),
+            autoescape=True,
+            auto_reload=False,
+        )
+        self._text_env = self._html_env.overlay(autoescape=False)
+
+        self._templates = {
+            name: (
+                self._html_env.get_template(f"{name}.html"),
+                self._text_env.get_template(f"{name}.txt"),
+            )
+            for name in templates
+        }
+
+    def render(self, template_name: str, /, **context) -> RenderedEmail:
+        """
+        Render the HTML and plaintext parts of one message
+
+        `template_name` is positional-only, so the templates' own `name`
+        placeholder can be passed as a keyword.
+        """
+        html_template, text_template = self._templates[template_name]
+        return RenderedEmail(html_template.render(context), text_template.render(context))
+
+    def render_batch(self, template_name: str, contexts: Iterable[dict]) -> list[RenderedEmail]:
+        """Render one template for many recipients (bulk notifications)"""
+        html_template, text_template = self._templates[template_name]
+        return [
+            RenderedEmail(html_template.render(context), text_template.render(context))
+            for context in contexts
+        ]
+
+
+email_templates = EmailTemplateRegistry({
+    "verification": VERIFICATION_EMAIL_TEMPLATE,
+    "reset_password": RESET_PASSWORD_TEMPLATE,
+})
+
+
 async def send_verification_email(email: str, name: str, token: str):
-    """Send email verification"""
+    """Queue email verification (sent by the outbox worker)"""
     verify_url = f"{settings.FRONTEND_URL}/verify-email?token={token}"
     print(f"Verification URL: {verify_url}")
 
-    html = Template(VERIFICATION_EMAIL_TEMPLATE).render(
-        name=name, verify_url=verify_url
-    )
+    rendered = email_templates.render("verification", name=name, verify_url=verify_url)
 
-    message = MessageSchema(
+    await email_outbox.enqueue(
+        to=email,
         subject="Verify Your Email - My Reading Journey",
-        recipients=[email],
-        body=html,
-        subtype=MessageType.html
+        html=rendered.html,
+        text=rendered.text
     )
 
-    await fastmail.send_message(message)
-
 
 async def send_password_reset_email(email: str, name: str, token: str):
-    """Send password reset email"""
+    """Queue password reset email (sent by the outbox worker)"""
     reset_url = f"{settings.FRONTEND_URL}/reset-password/{token}"
 
-    html = Template(RESET_PASSWORD_TEMPLATE).render(name=name, reset_url=reset_url)
+    rendered = email_templates.render("reset_password", name=name, reset_url=reset_url)
 
-    message = MessageSchema(
+    await email_outbox.enqueue(
+        to=email,
         subject="Reset Your Password - My Reading Journey",
-        recipients=[email],
-        body=html,
-        subtype=MessageType.html
+        html=rendered.html,
+        text=rendered.text
     )
 
-    await fastmail.send_message(message)
-    
\ No newline at end of file
+
+async def send_bulk_email(template: str, subject: str, recipients: list[dict]):
+    """
+    Queue one template for many recipients
+
+    Each recipient dict needs an `email` key; the whole dict is the render
+    context.
+    """
+    rendered = email_templates.render_batch(template, recipients)
+    await email_outbox.enqueue_many([
+        {"to": recipient["email"], "subject": subject, "html": message.html, "text": message.text}
+        for recipient, message in zip(recipients, rendered)
+    ])
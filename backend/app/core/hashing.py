@@ -0,0 +1,138 @@
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+import asyncio
+import logging
+import multiprocessing
+import os
+
+from colorama import Fore
+
+from app.core.config import settings
+from app.core.security import (
+    calibrate_bcrypt_rounds,
+    configure_bcrypt_rounds,
+    get_password_hash,
+    verify_password,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherPool:
+    """
+    Dedicated process pool shared by every bcrypt call site
+
+    bcrypt is deliberately slow and CPU bound, so it runs in its own worker
+    processes instead of the event loop or the default thread limiter. At
+    most `workers + max_queue` hashes may be in flight; anything beyond that
+    is rejected with 503 + Retry-After so a login burst cannot starve the
+    rest of the API.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retry_after: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.rounds: int | None = None
+        self._executor: ProcessPoolExecutor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self, rounds: int | None = None):
+        """Spawn the worker processes, optionally pinning the bcrypt cost"""
+        if rounds is not None:
+            self.rounds = rounds
+
+        if self._executor is None:
+            # spawn, not fork: the parent already runs an event loop and
+            # Motor's background threads, which must not be copied
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_bcrypt_rounds if self.rounds else None,
+                initargs=(self.rounds,) if self.rounds else (),
+            )
+            logger.info(
+                Fore.GREEN + f"bcrypt pool started with {self.workers} workers"
+                f" (rounds={self.rounds or 'default'})"
+            )
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, func, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again shortly.",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self.start()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop"""
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password off the event loop"""
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_pool = PasswordHasherPool(
+    workers=settings.BCRYPT_POOL_WORKERS,
+    max_queue=settings.BCRYPT_QUEUE_SIZE,
+    retry_after=settings.BCRYPT_RETRY_AFTER_SECONDS,
+)
+
+
+async def start_password_pool() -> None:
+    """
+    Settle the bcrypt cost for this host and start the pool
+
+    BCRYPT_ROUNDS pins the cost (recommended when many workers share a
+    database); otherwise it is calibrated to BCRYPT_TARGET_MS. Stored hashes
+    at another cost are upgraded on the user's next successful login.
+    """
+    rounds = settings.BCRYPT_ROUNDS or None
+
+    if rounds is None and settings.BCRYPT_TARGET_MS > 0:
+        loop = asyncio.get_running_loop()
+        rounds = await loop.run_in_executor(
+            None,
+            calibrate_bcrypt_rounds,
+            settings.BCRYPT_TARGET_MS,
+            settings.BCRYPT_MIN_ROUNDS,
+            settings.BCRYPT_MAX_ROUNDS,
+        )
+        logger.info(
+            Fore.GREEN + f"bcrypt calibrated to {rounds} rounds for ~{settings.BCRYPT_TARGET_MS} ms"
+        )
+
+    if rounds is not None:
+        configure_bcrypt_rounds(rounds)
+
+    password_pool.start(rounds)
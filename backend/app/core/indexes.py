@@ -0,0 +1,286 @@
+"""
+Declarative index manifest
+
+Every index the app relies on is listed here next to the query shape it
+serves. At startup IndexReconciler diffs the manifest against
+list_indexes() and builds whatever is missing in a background task, so a
+slow build never delays readiness. Indexes are never dropped
+automatically; run the CLI to see missing, unused and unmanaged ones:
+
+    python -m app.core.indexes            # report
+    python -m app.core.indexes --apply    # also build missing indexes
+"""
+from typing import NamedTuple
+import argparse
+import asyncio
+import logging
+
+from colorama import Fore
+from pymongo import IndexModel
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: tuple[tuple[str, int], ...]
+    serves: str
+    options: dict = {}
+
+    @property
+    def name(self) -> str:
+        """MongoDB's default index name for these keys"""
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def model(self) -> IndexModel:
+        return IndexModel(list(self.keys), name=self.name, **self.options)
+
+
+def index_manifest() -> list[IndexSpec]:
+    """Every index the routes and background workers depend on"""
+    manifest = [
+        # ── users ──────────────────────────────────────────────────────────
+        IndexSpec("users", (("email", 1),), "login/signup by email", {"unique": True}),
+        IndexSpec("users", (("user_name", 1),), "login/signup by user name", {"unique": True}),
+
+        # ── books (every list sort carries the _id tie-breaker) ────────────
+        IndexSpec(
+            "books", (("user_id", 1), ("reading_started", -1), ("_id", -1)),
+            "list date_desc/date_asc, year= range, prev/next neighbors, delete by user",
+        ),
+        IndexSpec(
+            "books", (("user_id", 1), ("is_favorite", 1), ("reading_started", -1)),
+            "favorites list, favorite= filter",
+        ),
+        IndexSpec("books", (("user_id", 1), ("title_norm", 1), ("_id", 1)), "list title_asc/title_desc"),
+        IndexSpec("books", (("user_id", 1), ("author_norm", 1), ("_id", 1)), "list author_asc/author_desc, author= prefix"),
+        IndexSpec("books", (("user_id", 1), ("rating", -1), ("_id", -1)), "list rating_desc, rating_min/max"),
+        IndexSpec("books", (("user_id", 1), ("genre_norm", 1)), "genre= prefix filter"),
+        IndexSpec("books", (("user_id", 1), ("search_tokens", 1)), "search="),
+        IndexSpec("books", (("user_id", 1), ("reading_year", -1)), "stats year histogram (covered)"),
+        IndexSpec("books", (("user_id", 1), ("created_at", 1)), "stats monthly added/pages trends"),
+        IndexSpec("books", (("user_id", 1), ("reading_finished", 1)), "stats monthly finished trend"),
+        IndexSpec("books", (("user_id", 1), ("updated_at", 1), ("_id", 1)), "changes since a sync token"),
+
+        # ── wishlist ───────────────────────────────────────────────────────
+        IndexSpec("wishlist", (("user_id", 1), ("priority", -1), ("created_at", -1)), "list priority_desc"),
+        IndexSpec("wishlist", (("user_id", 1), ("priority", 1), ("created_at", -1)), "list priority_asc"),
+        IndexSpec(
+            "wishlist", (("user_id", 1), ("created_at", -1)),
+            "list date_desc/date_asc, stats monthly trend, delete by user",
+        ),
+        IndexSpec("wishlist", (("user_id", 1), ("title_norm", 1), ("_id", 1)), "list title_asc/title_desc"),
+        IndexSpec("wishlist", (("user_id", 1), ("genre_norm", 1)), "genre= prefix filter"),
+        IndexSpec("wishlist", (("user_id", 1), ("search_tokens", 1)), "search="),
+        IndexSpec("wishlist", (("user_id", 1), ("updated_at", 1), ("_id", 1)), "changes since a sync token"),
+
+        # ── deletions: sync tombstones, expired by TTL ─────────────────────
+        IndexSpec(
+            "deletions", (("user_id", 1), ("collection", 1), ("deleted_at", 1)),
+            "deleted ids since a sync token",
+        ),
+        IndexSpec(
+            "deletions", (("deleted_at", 1),), "expire old tombstones",
+            {"expireAfterSeconds": settings.SYNC_TOMBSTONE_RETENTION_DAYS * 24 * 60 * 60},
+        ),
+
+        # ── email outbox: due-message claims, expired leases, retention ────
+        IndexSpec("email_outbox", (("status", 1), ("next_attempt_at", 1)), "claim due messages"),
+        IndexSpec("email_outbox", (("status", 1), ("locked_until", 1)), "reclaim expired leases"),
+        IndexSpec(
+            "email_outbox", (("sent_at", 1),), "expire sent messages",
+            {"expireAfterSeconds": settings.EMAIL_OUTBOX_RETENTION_DAYS * 24 * 60 * 60},
+        ),
+    ]
+
+    # Login throttle attempts (shared backend only), expired by TTL
+    if settings.LOGIN_THROTTLE_BACKEND == "mongo":
+        manifest += [
+            IndexSpec("login_attempts", (("key", 1), ("at", 1)), "count attempts in window"),
+            IndexSpec(
+                "login_attempts", (("at", 1),), "expire old attempts",
+                {"expireAfterSeconds": settings.LOGIN_THROTTLE_WINDOW_SECONDS},
+            ),
+        ]
+
+    return manifest
+
+
+async def existing_indexes(database, collection: str) -> dict[tuple, dict]:
+    """
+    Indexes currently on a collection, keyed by their key pattern
+
+    Numeric directions come back as 1.0 / -1.0 from some servers and are
+    normalized to ints; special index types ("text", "2dsphere", ...) are
+    kept as they are.
+    """
+    info = await database[collection].index_information()
+    return {
+        tuple(
+            (field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in index["key"]
+        ): {"name": name, **index}
+        for name, index in info.items()
+    }
+
+
+async def diff_indexes(database, manifest: list[IndexSpec] | None = None) -> dict:
+    """
+    Compare the manifest with the database
+
+    Returns `missing` (specs to build), `conflicting` (same keys, different
+    unique/TTL options) and `unmanaged` ((collection, name) pairs present in
+    the database but absent from the manifest, `_id_` excepted).
+    """
+    manifest = index_manifest() if manifest is None else manifest
+    missing, conflicting, unmanaged = [], [], []
+
+    for collection in sorted({spec.collection for spec in manifest}):
+        current = await existing_indexes(database, collection)
+        wanted = {spec.keys: spec for spec in manifest if spec.collection == collection}
+
+        for keys, spec in wanted.items():
+            index = current.get(keys)
+            if index is None:
+                missing.append(spec)
+                continue
+            for option, value in spec.options.items():
+                if index.get(option) != value:
+                    conflicting.append((spec, option, index.get(option)))
+
+        unmanaged += [
+            (collection, index["name"])
+            for keys, index in current.items()
+            if keys not in wanted and index["name"] != "_id_"
+        ]
+
+    return {"missing": missing, "conflicting": conflicting, "unmanaged": unmanaged}
+
+
+class IndexReconciler:
+    """Builds the manifest's missing indexes in the background after startup"""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self.missing = 0
+        self.built = 0
+        self.failed = 0
+        self.done = False
+
+    async def reconcile(self, database):
+        """Build every missing index, one at a time; failures are logged per index"""
+        diff = await diff_indexes(database)
+        self.missing = len(diff["missing"])
+
+        for spec, option, actual in diff["conflicting"]:
+            logger.warning(
+                Fore.YELLOW
+                + f"Index {spec.collection}.{spec.name} has {option}={actual}, manifest wants {spec.options[option]}"
+            )
+
+        for spec in diff["missing"]:
+            try:
+                await database[spec.collection].create_indexes([spec.model()])
+                self.built += 1
+                logger.info(Fore.GREEN + f"Built index {spec.collection}.{spec.name}")
+            except Exception as e:
+                self.failed += 1
+                logger.warning(Fore.YELLOW + f"Index {spec.collection}.{spec.name} failed: {e}")
+
+    async def _run(self, database):
+        try:
+            await self.reconcile(database)
+        except Exception as e:
+            logger.warning(Fore.YELLOW + f"Index reconciliation failed: {e}")
+        finally:
+            self.done = True
+
+    def start(self, database):
+        """Start reconciliation without blocking startup (call from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(database))
+
+    async def stop(self):
+        """Cancel a reconciliation still in progress (server-side builds continue)"""
+        if self._task is not None:
+            if not self._task.done():
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "done": self.done,
+            "missing": self.missing,
+            "built": self.built,
+            "failed": self.failed,
+        }
+
+
+index_reconciler = IndexReconciler()
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+async def _usage(database, collection: str) -> dict[str, int]:
+    """Operations per index since the server last restarted ($indexStats)"""
+    stats = await database[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+    return {s["name"]: s["accesses"]["ops"] for s in stats}
+
+
+async def _report(apply: bool):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(settings.MONGODB_URI.get_secret_value())
+    database = client[settings.MONGODB_DBNAME.get_secret_value()]
+
+    try:
+        manifest = index_manifest()
+        diff = await diff_indexes(database, manifest)
+
+        print("Missing indexes:")
+        for spec in diff["missing"]:
+            print(f"  {spec.collection}.{spec.name}  ({spec.serves})")
+        if not diff["missing"]:
+            print("  none")
+
+        print("\nOption conflicts:")
+        for spec, option, actual in diff["conflicting"]:
+            print(f"  {spec.collection}.{spec.name}  {option}={actual}, wanted {spec.options[option]}")
+        if not diff["conflicting"]:
+            print("  none")
+
+        print("\nUnused indexes (0 ops since server start):")
+        unused = 0
+        for collection in sorted({spec.collection for spec in manifest}):
+            for name, ops in (await _usage(database, collection)).items():
+                if ops == 0 and name != "_id_":
+                    unused += 1
+                    print(f"  {collection}.{name}")
+        if not unused:
+            print("  none")
+
+        print("\nNot in manifest (candidates to drop):")
+        for collection, name in diff["unmanaged"]:
+            print(f"  {collection}.{name}")
+        if not diff["unmanaged"]:
+            print("  none")
+
+        if apply and diff["missing"]:
+            print()
+            reconciler = IndexReconciler()
+            await reconciler.reconcile(database)
+            print(f"Built {reconciler.built} index(es), {reconciler.failed} failed")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report missing/unused MongoDB indexes")
+    parser.add_argument("--apply", action="store_true", help="build missing indexes")
+    asyncio.run(_report(parser.parse_args().apply))
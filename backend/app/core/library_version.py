@@ -0,0 +1,67 @@
+"""
+Per-user library version for ETag / If-None-Match
+
+Every book or wishlist mutation bumps `users.library_version` with $inc.
+Read routes fold that number (with the path and query string) into a
+strong ETag, and answer a matching If-None-Match with 304 after a single
+_id lookup, before running the list/stats queries. The version is read
+from MongoDB on each request rather than from a per-worker cache, so a
+write handled by another worker is never masked by a stale 304.
+"""
+import hashlib
+
+from fastapi import Request, Response, status
+
+from app.repositories.users import user_repository
+
+
+async def get_library_version(user_id) -> int:
+    """Current library version (0 for users that never wrote anything)"""
+    user = await user_repository.get_by_id(user_id, user_repository.LIBRARY_VERSION)
+    return (user or {}).get("library_version", 0)
+
+
+async def bump_library_version(user_id) -> None:
+    """Invalidate every ETag issued for this user's books and wishlist"""
+    await user_repository.increment(
+        user_id, "library_version", projection=user_repository.LIBRARY_VERSION
+    )
+
+
+def make_etag(request: Request, user_id, version: int, scope: str = "") -> str:
+    """Strong ETag for one representation of the library at `version`"""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    key = f"{user_id}:{version}:{request.url.path}?{query}:{scope}"
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def etag_headers(etag: str) -> dict:
+    """Headers for a response carrying `etag` (browsers must revalidate)"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+async def check_etag(request: Request, user_id, scope: str = "") -> tuple[str, Response | None]:
+    """
+    Compute the ETag for this request and short-circuit if the client has it
+
+    Returns `(etag, response)`; `response` is a ready 304 when the client's
+    If-None-Match matches, otherwise None and the route builds its body.
+    The version is read before any data, so a write racing with the
+    request can only make the ETag too old (a later 200), never too new.
+    """
+    version = await get_library_version(user_id)
+    etag = make_etag(request, user_id, version, scope)
+    if etag_matches(request, etag):
+        return etag, Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    return etag, None
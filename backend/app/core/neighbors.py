@@ -0,0 +1,124 @@
+"""
+Previous / next book in any list order
+
+Every list sort carries the `_id` tie-breaker, so each book has exactly
+one position. Its neighbors are found from the book's own sort keys with
+two keyset seeks (keyset_filter forwards, and on the reversed sort
+backwards), sent as one aggregation joined with $unionWith; each seek is
+a bounded walk of the (user_id, sort key, _id) index. Only with `wrap`
+at either end of the list does one more seek fetch the opposite end.
+
+With NEIGHBOR_ORDER_CACHE_SIZE > 0 a worker also keeps each (user, sort)
+ordered id list, keyed by the user's library_version so any book write
+(from any worker) retires it; repeated prev/next clicks then cost one
+`$in` lookup of the two neighbor ids.
+"""
+from bson import ObjectId
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import db
+from app.core.library_version import get_library_version
+from app.utils.pagination import cursor_values, keyset_filter, reverse_sort
+
+
+# (user_id, sort name, library_version) -> (ordered ids, id -> position)
+order_cache = TTLCache(
+    max_size=settings.NEIGHBOR_ORDER_CACHE_SIZE,
+    ttl=settings.NEIGHBOR_ORDER_CACHE_TTL_SECONDS,
+)
+
+
+def _seek(user_id, sort: list[tuple[str, int]], values: list, side: str, projection: dict | None) -> list[dict]:
+    """Pipeline for the first book after `values` in `sort` order"""
+    return [
+        {"$match": {"user_id": user_id, **keyset_filter(sort, values)}},
+        {"$sort": dict(sort)},
+        {"$limit": 1},
+        *([{"$project": projection}] if projection else []),
+        {"$set": {"_side": side}},
+    ]
+
+
+async def _edge(user_id, sort: list[tuple[str, int]], exclude: ObjectId, projection: dict | None):
+    """First book in `sort` order other than `exclude` (for wrap-around)"""
+    book = await db.books.find_one({"user_id": user_id}, projection, sort=sort)
+    return None if book is None or book["_id"] == exclude else book
+
+
+async def _by_seek(user_id, book_id: ObjectId, sort, wrap: bool, projection: dict | None):
+    anchor = await db.books.find_one(
+        {"_id": book_id, "user_id": user_id}, {field: 1 for field, _ in sort}
+    )
+    if anchor is None:
+        return None
+
+    values = cursor_values(anchor, sort)
+    backwards = reverse_sort(sort)
+    pipeline = [
+        *_seek(user_id, sort, values, "next", projection),
+        {"$unionWith": {"coll": "books", "pipeline": _seek(user_id, backwards, values, "prev", projection)}},
+    ]
+    found = {doc.pop("_side"): doc for doc in await db.books.aggregate(pipeline).to_list(length=2)}
+    previous, following = found.get("prev"), found.get("next")
+
+    if wrap and following is None:
+        following = await _edge(user_id, sort, book_id, projection)
+    elif wrap and previous is None:
+        previous = await _edge(user_id, backwards, book_id, projection)
+    return previous, following
+
+
+async def _ordered_ids(user_id, sort_name: str, sort, version: int) -> tuple[list, dict]:
+    """The user's book ids in `sort` order, cached per library version"""
+    key = (str(user_id), sort_name, version)
+    order = order_cache.get(key)
+    if order is None:
+        books = await db.books.find({"user_id": user_id}, {"_id": 1}, sort=sort).to_list(length=None)
+        ids = [book["_id"] for book in books]
+        order = (ids, {book_id: position for position, book_id in enumerate(ids)})
+        order_cache.set(key, order)
+    return order
+
+
+async def _by_order(user_id, book_id: ObjectId, sort_name: str, sort, version: int, wrap: bool, projection):
+    ids, positions = await _ordered_ids(user_id, sort_name, sort, version)
+    position = positions.get(book_id)
+    if position is None:
+        return None
+
+    previous = ids[position - 1] if position > 0 or wrap else None
+    following = ids[(position + 1) % len(ids)] if position + 1 < len(ids) or wrap else None
+    wanted = {previous, following} - {None, book_id}
+    docs = {}
+    if wanted:
+        books = await db.books.find(
+            {"_id": {"$in": list(wanted)}, "user_id": user_id}, projection
+        ).to_list(length=2)
+        docs = {book["_id"]: book for book in books}
+    return docs.get(previous), docs.get(following)
+
+
+async def find_neighbors(
+    user_id,
+    book_id: ObjectId,
+    sort_name: str,
+    sort: list[tuple[str, int]],
+    version: int | None = None,
+    wrap: bool = False,
+    projection: dict | None = None,
+):
+    """
+    `(previous, next)` documents around a book in `sort` order
+
+    `sort` must end with the `_id` tie-breaker. Returns None when the book
+    doesn't exist or isn't the user's; either side is None at the ends of
+    the list unless `wrap` is set (and the library has another book).
+    `version` (the library_version) is looked up only for the order cache
+    when the caller doesn't already have it.
+    """
+    if order_cache.enabled:
+        if version is None:
+            version = await get_library_version(user_id)
+        return await _by_order(user_id, book_id, sort_name, sort, version, wrap, projection)
+    return await _by_seek(user_id, book_id, sort, wrap, projection)
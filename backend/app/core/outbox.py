@@ -0,0 +1,245 @@
+from datetime import datetime, timezone, timedelta
+from email.message import EmailMessage
+from pymongo import ReturnDocument
+import asyncio
+import logging
+import time
+
+import aiosmtplib
+from colorama import Fore
+
+from app.core.config import settings
+from app.core.database import db
+
+
+logger = logging.getLogger(__name__)
+
+
+OUTBOX_COLLECTION = "email_outbox"
+
+
+class EmailOutbox:
+    """
+    Durable email outbox with a background sender
+
+    Requests only insert a message into the `email_outbox` collection and
+    return. A lifespan-managed task claims due messages in batches (an
+    atomic find_one_and_update lease, so several workers never send the
+    same message), sends them over one SMTP session that stays open while
+    mail keeps flowing, and retries failures with exponential backoff.
+    """
+
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._smtp_last_used = 0.0
+        self.sent = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+
+    @property
+    def collection(self):
+        return db[OUTBOX_COLLECTION]
+
+    # ── Producer side ─────────────────────────────────────────────────────
+    @staticmethod
+    def _new_message(to: str, subject: str, html: str, text: str | None, now: datetime) -> dict:
+        return {
+            "to": to,
+            "subject": subject,
+            "html": html,
+            "text": text,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+
+    async def enqueue(self, to: str, subject: str, html: str, text: str | None = None):
+        """Persist a message for the background sender and wake it up"""
+        now = datetime.now(timezone.utc)
+        await self.collection.insert_one(self._new_message(to, subject, html, text, now))
+        self._wakeup.set()
+
+    async def enqueue_many(self, messages: list[dict]):
+        """Persist many messages (dicts with to/subject/html/text) in one insert"""
+        if not messages:
+            return
+        now = datetime.now(timezone.utc)
+        await self.collection.insert_many(
+            [
+                self._new_message(m["to"], m["subject"], m["html"], m.get("text"), now)
+                for m in messages
+            ],
+            ordered=False,
+        )
+        self._wakeup.set()
+
+    # ── Consumer side ─────────────────────────────────────────────────────
+    async def _claim(self) -> dict | None:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    # Lease of a worker that died mid-send ran out
+                    {"status": "sending", "locked_until": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "sending",
+                    "locked_until": now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+                }
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _claim_batch(self) -> list[dict]:
+        batch = []
+        while len(batch) < settings.EMAIL_OUTBOX_BATCH_SIZE:
+            message = await self._claim()
+            if message is None:
+                break
+            batch.append(message)
+        return batch
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        """Return the open SMTP session, connecting if needed"""
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = aiosmtplib.SMTP(
+                hostname=settings.MAIL_SERVER,
+                port=settings.MAIL_PORT,
+                use_tls=settings.MAIL_SSL_TLS,
+                start_tls=settings.MAIL_USE_TLS,
+                validate_certs=settings.MAIL_VALIDATE_CERTS,
+            )
+            await smtp.connect()
+            if settings.MAIL_USE_CREDENTIALS:
+                await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD.get_secret_value())
+            self._smtp = smtp
+        return self._smtp
+
+    async def _close_connection(self):
+        if self._smtp is not None:
+            try:
+                await self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+    @staticmethod
+    def _build_message(message: dict) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = settings.MAIL_FROM
+        email["To"] = message["to"]
+        email["Subject"] = message["subject"]
+        email.set_content(message.get("text") or "This message requires an HTML-capable email client.")
+        email.add_alternative(message["html"], subtype="html")
+        return email
+
+    async def _mark_sent(self, message: dict):
+        await self.collection.update_one(
+            {"_id": message["_id"]},
+            {
+                "$set": {"status": "sent", "sent_at": datetime.now(timezone.utc)},
+                "$unset": {"locked_until": ""},
+            },
+        )
+        self.sent += 1
+
+    async def _mark_failed(self, message: dict, error: Exception):
+        attempts = message.get("attempts", 0) + 1
+        self.failed_attempts += 1
+
+        if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            update = {"status": "failed"}
+            self.dead_lettered += 1
+            logger.error(Fore.RED + f"Giving up on email to {message['to']}: {error}")
+        else:
+            delay = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            update = {
+                "status": "pending",
+                "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+            }
+
+        await self.collection.update_one(
+            {"_id": message["_id"]},
+            {
+                "$set": {**update, "attempts": attempts, "last_error": str(error)[:500]},
+                "$unset": {"locked_until": ""},
+            },
+        )
+
+    async def _send_batch(self, batch: list[dict]):
+        for message in batch:
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(self._build_message(message))
+                self._smtp_last_used = time.monotonic()
+            except Exception as e:
+                # Drop a possibly broken session; the next message reconnects
+                await self._close_connection()
+                await self._mark_failed(message, e)
+                continue
+            await self._mark_sent(message)
+
+    async def drain(self) -> int:
+        """
+        Send every due message now; returns how many were attempted
+
+        Stops between batches once `stop()` was called, so shutdown waits
+        for one batch rather than the whole backlog; the rest stays
+        pending for the next start (or another worker).
+        """
+        attempted = 0
+        while not self._stopping and (batch := await self._claim_batch()):
+            await self._send_batch(batch)
+            attempted += len(batch)
+        return attempted
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.warning(Fore.YELLOW + f"Email outbox error: {e}")
+
+            idle_for = time.monotonic() - self._smtp_last_used
+            if self._smtp is not None and idle_for >= settings.SMTP_IDLE_TIMEOUT_SECONDS:
+                await self._close_connection()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.EMAIL_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        """Start the background sender (call from the app lifespan)"""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Let the current batch finish, then close the SMTP session"""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self._close_connection()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed_attempts": self.failed_attempts,
+            "dead_lettered": self.dead_lettered,
+            "smtp_connected": self._smtp is not None and self._smtp.is_connected,
+        }
+
+
+email_outbox = EmailOutbox()
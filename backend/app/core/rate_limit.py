@@ -0,0 +1,191 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timezone, timedelta
+from fastapi import HTTPException, Request, status
+import math
+import time
+
+from app.core.config import settings
+from app.core.database import db
+
+
+class MemoryWindowBackend:
+    """
+    Sliding-window attempt log held in this worker process
+
+    Tracks at most `max_keys` keys; the least recently used are dropped
+    first, so a flood of unique keys cannot grow memory without bound.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._attempts: OrderedDict[str, deque] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window: int) -> float | None:
+        """Record an attempt; return seconds to wait if the limit is reached"""
+        now = time.monotonic()
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            attempts = self._attempts[key] = deque()
+        self._attempts.move_to_end(key)
+
+        while attempts and attempts[0] <= now - window:
+            attempts.popleft()
+
+        if len(attempts) >= limit:
+            return attempts[0] + window - now
+
+        attempts.append(now)
+        while len(self._attempts) > self.max_keys:
+            self._attempts.popitem(last=False)
+        return None
+
+    async def reset(self, key: str):
+        self._attempts.pop(key, None)
+
+    async def undo(self, key: str):
+        """Drop the most recent attempt (it turned out to be a success)"""
+        attempts = self._attempts.get(key)
+        if attempts:
+            attempts.pop()
+
+
+class MongoWindowBackend:
+    """
+    Sliding-window attempt log shared by every worker through MongoDB
+
+    Each attempt is one small document; a TTL index on `at` removes them
+    once they fall out of the window.
+    """
+
+    collection_name = "login_attempts"
+
+    async def hit(self, key: str, limit: int, window: int) -> float | None:
+        now = datetime.now(timezone.utc)
+        since = now - timedelta(seconds=window)
+        collection = db[self.collection_name]
+
+        recent = await collection.count_documents({"key": key, "at": {"$gt": since}}, limit=limit)
+        if recent >= limit:
+            oldest = await collection.find_one(
+                {"key": key, "at": {"$gt": since}}, {"at": 1}, sort=[("at", 1)]
+            )
+            if oldest is None:
+                return float(window)
+            oldest_at = oldest["at"].replace(tzinfo=timezone.utc)
+            return max((oldest_at + timedelta(seconds=window) - now).total_seconds(), 1.0)
+
+        await collection.insert_one({"key": key, "at": now})
+        return None
+
+    async def reset(self, key: str):
+        await db[self.collection_name].delete_many({"key": key})
+
+    async def undo(self, key: str):
+        """Drop the most recent attempt (it turned out to be a success)"""
+        await db[self.collection_name].find_one_and_delete({"key": key}, sort=[("at", -1)])
+
+
+def client_ip(request: Request) -> str:
+    """
+    The caller's IP address, as seen by the outermost trusted proxy
+
+    Behind a reverse proxy `request.client.host` is the proxy itself, so
+    with TRUSTED_PROXY_HOPS = n the address n entries from the right of
+    X-Forwarded-For is used (entries further left are client-supplied and
+    can be forged). With 0 hops, or a header shorter than that, the socket
+    peer is used.
+    """
+    peer = request.client.host if request.client else "unknown"
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops <= 0:
+        return peer
+
+    forwarded = [
+        part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()
+    ]
+    if len(forwarded) < hops:
+        return peer
+    return forwarded[-hops]
+
+
+class LoginThrottle:
+    """
+    Brute-force throttle for /auth/login
+
+    Limits attempts per (login identifier, client IP) pair and, when
+    `max_per_ip` > 0, per client IP. Excess attempts are rejected with 429
+    before the user lookup and bcrypt verification, so a credential-stuffing
+    burst costs almost no CPU. Successful logins are taken back out of both
+    windows, so only failures count towards either limit.
+    """
+
+    def __init__(self, backend, max_attempts: int, max_per_ip: int, window: int, enabled: bool = True):
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.max_per_ip = max_per_ip
+        self.window = window
+        self.enabled = enabled
+        self.checked = 0
+        self.blocked_identifier = 0
+        self.blocked_ip = 0
+
+    @staticmethod
+    def _pair_key(identifier: str, ip: str) -> str:
+        return f"login:{identifier.strip().lower()}|{ip}"
+
+    @staticmethod
+    def _ip_key(ip: str) -> str:
+        return f"ip:{ip}"
+
+    def _reject(self, retry_after: float):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def check(self, identifier: str, ip: str):
+        """Count an attempt, raising 429 when either limit is exceeded"""
+        if not self.enabled:
+            return
+
+        self.checked += 1
+
+        if self.max_per_ip > 0:
+            retry_after = await self.backend.hit(self._ip_key(ip), self.max_per_ip, self.window)
+            if retry_after is not None:
+                self.blocked_ip += 1
+                self._reject(retry_after)
+
+        retry_after = await self.backend.hit(
+            self._pair_key(identifier, ip), self.max_attempts, self.window
+        )
+        if retry_after is not None:
+            self.blocked_identifier += 1
+            self._reject(retry_after)
+
+    async def reset(self, identifier: str, ip: str):
+        """Forget the identifier's attempts and uncount this one for the IP after a successful login"""
+        if not self.enabled:
+            return
+        await self.backend.reset(self._pair_key(identifier, ip))
+        if self.max_per_ip > 0:
+            await self.backend.undo(self._ip_key(ip))
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "checked": self.checked,
+            "blocked": self.blocked_identifier + self.blocked_ip,
+            "blocked_identifier": self.blocked_identifier,
+            "blocked_ip": self.blocked_ip,
+        }
+
+
+login_throttle = LoginThrottle(
+    backend=MongoWindowBackend() if settings.LOGIN_THROTTLE_BACKEND == "mongo" else MemoryWindowBackend(),
+    max_attempts=settings.LOGIN_THROTTLE_MAX_ATTEMPTS,
+    max_per_ip=settings.LOGIN_THROTTLE_MAX_PER_IP,
+    window=settings.LOGIN_THROTTLE_WINDOW_SECONDS,
+    enabled=settings.LOGIN_THROTTLE_ENABLED,
+)
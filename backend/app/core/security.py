@@ -2,6 +2,12 @@ from fastapi import HTTPException, status
 from datetime import datetime, timezone, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
+import hashlib
+import math
+import time
+
+from app.core.cache import TTLCache
 from app.core.settings import settings
 
 
@@ -16,6 +22,13 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 
+# Decoded access-token claims keyed by SHA-256 of the token. Each entry
+# expires exactly at the token's `exp`, so a cached token can never outlive
+# its signature. Purpose tokens (email verification, password reset) and
+# refresh tokens are never cached.
+token_cache = TTLCache(max_size=settings.JWT_DECODE_CACHE_SIZE)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -26,6 +39,47 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_update(hashed_password: str) -> bool:
+    """True when a stored hash uses a different cost than the current one"""
+    return pwd_context.needs_update(hashed_password)
+
+
+def configure_bcrypt_rounds(rounds: int) -> None:
+    """
+    Use `rounds` as the bcrypt cost for new hashes
+
+    Hashes below `rounds` or more than one round above it are flagged by
+    needs_update; the one-round tolerance stops workers whose calibration
+    landed on neighbouring costs from rehashing each other's output.
+    """
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds + 1,
+    )
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int = 10, max_rounds: int = 16, probe_rounds: int = 10
+) -> int:
+    """
+    Pick the bcrypt cost whose hash time is closest to `target_ms` here
+
+    Times a few hashes at `probe_rounds` and extrapolates, since each extra
+    round doubles the work.
+    """
+    handler = bcrypt.using(rounds=probe_rounds)
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        handler.hash("calibration-probe")
+        samples.append((time.perf_counter() - start) * 1000)
+
+    probe_ms = max(min(samples), 0.001)
+    rounds = probe_rounds + round(math.log2(target_ms / probe_ms))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -39,6 +93,21 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded_jwt
 
 
+def access_token_claims(user: dict) -> dict:
+    """
+    Claims embedded in an access token for a user document
+
+    `ver` mirrors the user's token_version so bumping it revokes every token
+    issued before; `vrf`/`act` let stateless mode skip the users lookup.
+    """
+    return {
+        "sub": str(user["_id"]),
+        "ver": user.get("token_version", 0),
+        "vrf": bool(user.get("is_verified", False)),
+        "act": bool(user.get("is_active", True)),
+    }
+
+
 def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
     to_encode = data.copy()
@@ -50,13 +119,23 @@ def create_refresh_token(data: dict) -> str:
 
 def decode_token(token: str) -> dict:
     """Decode and verify JWT token"""
+    digest = hashlib.sha256(token.encode()).digest()
+    
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
+    
+    if payload.get("type") == "access" and "purpose" not in payload and "exp" in payload:
+        token_cache.set(digest, dict(payload), ttl=payload["exp"] - time.time())
+    
+    return payload
         
\ No newline at end of file
@@ -0,0 +1,310 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+import asyncio
+from itertools import islice
+import heapq
+import time
+
+from app.core.config import settings
+from app.core.database import db
+from app.utils.search import tokenize
+
+
+# Suggestion kinds, in the order they are ranked when otherwise equal
+KINDS = ("title", "author", "genre")
+
+# Rough per-object costs used to keep the registry under its memory budget
+_TERM_BYTES = 200
+_GRAM_BYTES = 70
+_BOOK_BYTES = 120
+
+# Most candidates checked for mid-term matches, bounding very broad queries
+_MAX_SCAN = 2000
+
+
+def _grams(word: str) -> set[str]:
+    """Trigrams of a word padded at the start, so 1-2 char prefixes work too"""
+    padded = "$$" + word
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SuggestIndex:
+    """
+    Trigram index over one user's distinct titles, authors and genres
+
+    Each distinct (kind, normalized text) is a term that remembers how many
+    books use it. Terms that start with the query come straight from a
+    sorted list per kind (a bisect, however broad the prefix); only when
+    those don't fill the page are word-prefix matches inside longer terms
+    found by intersecting trigram postings.
+    """
+
+    def __init__(self):
+        # (kind, normalized text) -> [display text, book count, words]
+        self._terms: dict[tuple[str, str], list] = {}
+        self._grams: dict[str, dict[str, set[str]]] = {kind: {} for kind in KINDS}
+        self._sorted: dict[str, list[str]] = {kind: [] for kind in KINDS}
+        self._books: dict[str, list[tuple[str, str]]] = {}
+        self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def add_book(self, book_id: str, book: dict):
+        """Index (or re-index) a book's title, author and genre"""
+        self.remove_book(book_id)
+
+        keys = []
+        for kind in KINDS:
+            text = (book.get(kind) or "").strip()
+            words = tokenize(text)
+            if not words:
+                continue
+            key = (kind, " ".join(words))
+            entry = self._terms.get(key)
+            if entry is None:
+                self._terms[key] = [text, 1, words]
+                grams = set().union(*(_grams(w) for w in words))
+                for gram in grams:
+                    self._grams[kind].setdefault(gram, set()).add(key[1])
+                insort(self._sorted[kind], key[1])
+                self.size_bytes += _TERM_BYTES + 2 * len(text) + _GRAM_BYTES * len(grams)
+            else:
+                entry[1] += 1
+            keys.append(key)
+
+        self._books[book_id] = keys
+        self.size_bytes += _BOOK_BYTES
+
+    def remove_book(self, book_id: str):
+        """Drop a book; terms no other book uses are removed with it"""
+        keys = self._books.pop(book_id, None)
+        if keys is None:
+            return
+        self.size_bytes -= _BOOK_BYTES
+
+        for key in keys:
+            entry = self._terms[key]
+            entry[1] -= 1
+            if entry[1] > 0:
+                continue
+
+            kind, joined = key
+            del self._terms[key]
+            grams = set().union(*(_grams(w) for w in entry[2]))
+            for gram in grams:
+                postings = self._grams[kind].get(gram)
+                if postings is not None:
+                    postings.discard(joined)
+                    if not postings:
+                        del self._grams[kind][gram]
+            ordered = self._sorted[kind]
+            del ordered[bisect_left(ordered, joined)]
+            self.size_bytes -= _TERM_BYTES + 2 * len(entry[0]) + _GRAM_BYTES * len(grams)
+
+    def _suggestion(self, kind: str, joined: str) -> dict:
+        display, count, _ = self._terms[(kind, joined)]
+        return {"text": display, "type": kind, "count": count}
+
+    def _starting_with(self, kind: str, phrase: str, limit: int) -> list[str]:
+        """Terms of a kind that start with `phrase`, most used first"""
+        ordered = self._sorted[kind]
+        start = bisect_left(ordered, phrase)
+        window = []
+        for joined in ordered[start:start + limit * 20]:
+            if not joined.startswith(phrase):
+                break
+            window.append(joined)
+        window.sort(key=lambda joined: (-self._terms[(kind, joined)][1], joined))
+        return window[:limit]
+
+    def _containing(self, kind: str, words: list[str], phrase: str, limit: int) -> list[str]:
+        """Terms of a kind where every query word prefixes some later word"""
+        postings = []
+        for word in words:
+            for gram in _grams(word):
+                matches = self._grams[kind].get(gram)
+                if not matches:
+                    return []
+                postings.append(matches)
+
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+
+        def matches(joined: str) -> bool:
+            if joined.startswith(phrase):
+                return False    # already returned by _starting_with
+            term_words = self._terms[(kind, joined)][2]
+            return all(any(tw.startswith(w) for tw in term_words) for w in words)
+
+        return [
+            joined
+            for _, joined in heapq.nsmallest(
+                limit,
+                (
+                    (-self._terms[(kind, j)][1], j)
+                    for j in islice(candidates, _MAX_SCAN)
+                    if matches(j)
+                ),
+            )
+        ]
+
+    def query(self, text: str, limit: int = 10) -> list[dict]:
+        """Terms matching every word of `text` as a prefix, best first"""
+        words = tokenize(text)[:5]
+        if not words:
+            return []
+        phrase = " ".join(words)
+
+        results = []
+        for kind in KINDS:
+            for joined in self._starting_with(kind, phrase, limit - len(results)):
+                results.append(self._suggestion(kind, joined))
+            if len(results) >= limit:
+                return results
+
+        for kind in KINDS:
+            for joined in self._containing(kind, words, phrase, limit - len(results)):
+                results.append(self._suggestion(kind, joined))
+            if len(results) >= limit:
+                break
+
+        return results
+
+
+class SuggestIndexRegistry:
+    """
+    Per-user SuggestIndex instances, built lazily and kept under a memory budget
+
+    Indexes are built from the user's books on first use, updated in place
+    by the book write paths in this worker, evicted least-recently-used
+    once `max_bytes` is exceeded, and rebuilt after `ttl` seconds so
+    writes handled by other workers show up eventually.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._indexes: OrderedDict[str, tuple[float, SuggestIndex]] = OrderedDict()
+        self._building: dict[str, asyncio.Lock] = {}
+        self._waiting: dict[str, int] = {}      # callers holding or queued on each lock
+        self._dirty: set[str] = set()
+        self.size_bytes = 0
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def _fresh(self, key: str) -> SuggestIndex | None:
+        entry = self._indexes.get(key)
+        if entry is None:
+            return None
+        built_at, index = entry
+        if time.monotonic() - built_at > self.ttl:
+            self._drop(key)
+            return None
+        self._indexes.move_to_end(key)
+        return index
+
+    def _drop(self, key: str):
+        entry = self._indexes.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1].size_bytes
+
+    def _store(self, key: str, index: SuggestIndex):
+        self._drop(key)
+        self._indexes[key] = (time.monotonic(), index)
+        self.size_bytes += index.size_bytes
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        while self.size_bytes > self.max_bytes and len(self._indexes) > 1:
+            _, (_, index) = self._indexes.popitem(last=False)
+            self.size_bytes -= index.size_bytes
+            self.evictions += 1
+
+    async def _build(self, user_id) -> SuggestIndex:
+        index = SuggestIndex()
+        cursor = db.books.find({"user_id": user_id}, {"title": 1, "author": 1, "genre": 1})
+        async for book in cursor:
+            index.add_book(str(book["_id"]), book)
+        self.builds += 1
+        return index
+
+    async def get(self, user_id) -> SuggestIndex:
+        """Return the user's index, building it if missing or expired"""
+        key = str(user_id)
+        index = self._fresh(key)
+        if index is not None:
+            self.hits += 1
+            return index
+
+        # One build per user at a time; concurrent callers wait for it. The
+        # lock stays registered until its last waiter is done, otherwise a
+        # newcomer could start a second build while waiters are still queued.
+        lock = self._building.setdefault(key, asyncio.Lock())
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            async with lock:
+                index = self._fresh(key)
+                if index is not None:
+                    self.hits += 1
+                    return index
+
+                self._dirty.discard(key)
+                index = await self._build(user_id)
+                if key in self._dirty:
+                    # A write landed mid-build; serve this result but don't keep it
+                    self._dirty.discard(key)
+                else:
+                    self._store(key, index)
+                return index
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+                del self._building[key]
+
+    def _update(self, user_id, change):
+        key = str(user_id)
+        if key in self._building:
+            self._dirty.add(key)
+
+        entry = self._indexes.get(key)
+        if entry is None:
+            return
+        index = entry[1]
+        before = index.size_bytes
+        change(index)
+        self.size_bytes += index.size_bytes - before
+        self._enforce_budget()
+
+    def book_saved(self, user_id, book: dict):
+        """Reflect a created or edited book (no-op if the index isn't loaded)"""
+        self._update(user_id, lambda index: index.add_book(str(book["_id"]), book))
+
+    def book_deleted(self, user_id, book_id):
+        """Reflect a deleted book (no-op if the index isn't loaded)"""
+        self._update(user_id, lambda index: index.remove_book(str(book_id)))
+
+    def invalidate(self, user_id):
+        """Forget a user's index, e.g. after a bulk import or account deletion"""
+        key = str(user_id)
+        if key in self._building:
+            self._dirty.add(key)
+        self._drop(key)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._indexes),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "builds": self.builds,
+            "evictions": self.evictions,
+        }
+
+
+suggest_indexes = SuggestIndexRegistry(
+    max_bytes=settings.SUGGEST_INDEX_MEMORY_MB * 1024 * 1024,
+    ttl=settings.SUGGEST_INDEX_TTL_SECONDS,
+)
@@ -0,0 +1,126 @@
+"""
+Delta sync for clients that keep a local copy of the library
+
+`GET /books/changes` and `GET /wishlist/changes` return the documents
+whose `updated_at` is at or after the client's sync token, read in
+(updated_at, _id) order from the (user_id, updated_at, _id) index, plus
+the ids deleted since then. Deletions leave a tombstone in the
+`deletions` collection, which a TTL index expires after
+SYNC_TOMBSTONE_RETENTION_DAYS; a token older than that gets 410 Gone and
+the client reloads from scratch (a sync without `since`).
+
+The token is an opaque cursor holding three values:
+
+* `after` / `after_id` — where the next page of changes starts. A full
+  page leaves them at its last document; the final page resets them to
+  the sync start time (with no id) minus SYNC_CLOCK_SKEW_SECONDS, so a
+  write that was stamped just before the sync but committed just after
+  is picked up next time. Clients upsert by id, so the overlap is safe.
+* `deleted_since` — tombstones at or after this time are reported on the
+  final page of a sync, after every changed document has been sent.
+"""
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.database import db
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+DELETIONS_COLLECTION = "deletions"
+
+# Order changes are replayed in, served by the (user_id, updated_at, _id) index
+CHANGES_SORT = [("updated_at", 1), ("_id", 1)]
+
+
+def _as_utc(value: datetime) -> datetime:
+    """MongoDB hands back naive UTC datetimes; make them comparable"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+async def record_deletions(user_id, collection: str, doc_ids) -> None:
+    """Leave a tombstone for each deleted document so syncing clients drop it"""
+    deleted_at = datetime.now(timezone.utc)
+    tombstones = [
+        {"user_id": user_id, "collection": collection, "doc_id": doc_id, "deleted_at": deleted_at}
+        for doc_id in doc_ids
+    ]
+    if tombstones:
+        await db[DELETIONS_COLLECTION].insert_many(tombstones, ordered=False)
+
+
+def _decode_token(since: str, collection: str) -> tuple:
+    """`(after, after_id, deleted_since)` from a sync token, or 400 / 410"""
+    try:
+        after, after_id, deleted_since = decode_cursor(since, f"changes:{collection}", 3)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token"
+        )
+
+    if (
+        not isinstance(after, (datetime, type(None)))
+        or not isinstance(after_id, (ObjectId, type(None)))
+        or not isinstance(deleted_since, datetime)
+        or (after is None and after_id is None)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token"
+        )
+
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if _as_utc(deleted_since) < datetime.now(timezone.utc) - retention:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired, reload without `since`",
+        )
+    return after, after_id, deleted_since
+
+
+async def changes_since(collection: str, user_id, since: str | None, limit: int) -> dict:
+    """
+    One page of changes for a user's books or wishlist
+
+    Returns `changed` (raw documents), `deleted` (ids, final page only),
+    `next_since` and `has_more`. Without `since` every document is
+    returned, which is how a client builds its first local copy.
+    """
+    started = datetime.now(timezone.utc) - timedelta(seconds=settings.SYNC_CLOCK_SKEW_SECONDS)
+    query = {"user_id": user_id}
+
+    if since:
+        after, after_id, deleted_since = _decode_token(since, collection)
+        if after_id is None:
+            query["updated_at"] = {"$gte": after}
+        else:
+            query.update(keyset_filter(CHANGES_SORT, [after, after_id]))
+    else:
+        deleted_since = started
+
+    docs = await (
+        db[collection].find(query).sort(CHANGES_SORT).limit(limit + 1).to_list(length=limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    deleted = []
+    if has_more:
+        last = docs[-1]
+        next_values = [last.get("updated_at"), last["_id"], deleted_since]
+    else:
+        next_values = [started, None, started]
+        if since:
+            tombstones = await db[DELETIONS_COLLECTION].find(
+                {"user_id": user_id, "collection": collection, "deleted_at": {"$gte": deleted_since}},
+                {"_id": 0, "doc_id": 1},
+            ).to_list(length=None)
+            deleted = list(dict.fromkeys(str(t["doc_id"]) for t in tombstones))
+
+    return {
+        "changed": docs,
+        "deleted": deleted,
+        "next_since": encode_cursor(f"changes:{collection}", next_values),
+        "has_more": has_more,
+    }
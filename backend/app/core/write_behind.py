@@ -0,0 +1,105 @@
+from datetime import datetime
+from pymongo import UpdateOne
+import asyncio
+import logging
+
+from colorama import Fore
+
+from app.core.config import settings
+from app.core.database import db
+
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Write-behind coalescer for users.last_login
+
+    Logins only record a timestamp in memory; a background task flushes
+    the latest timestamp per user with one unordered bulk_write every
+    `interval` seconds (or sooner once `max_pending` users are waiting).
+    `$max` keeps the newest value when several workers flush the same user.
+    """
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: dict = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.recorded = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    def record(self, user_id, at: datetime):
+        """Remember a successful login (no I/O)"""
+        previous = self._pending.get(user_id)
+        if previous is None or at > previous:
+            self._pending[user_id] = at
+        self.recorded += 1
+
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write every pending timestamp in one bulk_write"""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        operations = [
+            UpdateOne({"_id": user_id}, {"$max": {"last_login": at}})
+            for user_id, at in pending.items()
+        ]
+
+        try:
+            await db.users.bulk_write(operations, ordered=False)
+            self.flushed += len(operations)
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.warning(Fore.YELLOW + f"last_login flush failed: {e}")
+            # Put the batch back unless newer logins already replaced it
+            for user_id, at in pending.items():
+                if user_id not in self._pending or self._pending[user_id] < at:
+                    self._pending[user_id] = at
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flusher (call from the app lifespan)"""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still pending"""
+        if self._task is not None:
+            # Let an in-flight flush finish instead of cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+last_login_buffer = LastLoginBuffer(
+    interval=settings.LAST_LOGIN_FLUSH_SECONDS,
+    max_pending=settings.LAST_LOGIN_MAX_PENDING,
+)
@@ -0,0 +1,7 @@
+from app.repositories.users import UserRepository, user_repository
+
+
+__all__ = [
+    'UserRepository',
+    'user_repository'
+]
@@ -0,0 +1,120 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.results import UpdateResult, DeleteResult
+
+from app.core.database import db
+
+
+class UserRepository:
+    """
+    Data access for the users collection
+
+    Every read names the projection for its use case, so a request only
+    moves the fields it needs over the wire (most never need the bcrypt
+    hash, bio or hobbies). Writes do not touch the principal cache; callers
+    invalidate it (see app.core.dependencies).
+    """
+
+    # Token validation: existence, status flags and revocation counter
+    AUTH = {"_id": 1, "is_verified": 1, "is_active": 1, "token_version": 1}
+
+    # Login: credentials plus what the login response returns
+    LOGIN = {
+        "_id": 1,
+        "password": 1,
+        "full_name": 1,
+        "user_name": 1,
+        "email": 1,
+        "theme": 1,
+        "profile_picture": 1,
+        "is_verified": 1,
+        "is_active": 1,
+        "token_version": 1,
+    }
+
+    # Password change: only the hash
+    PASSWORD = {"_id": 1, "password": 1}
+
+    # Verification / reset emails
+    EMAIL = {"_id": 1, "email": 1, "full_name": 1, "is_verified": 1}
+
+    # Authenticated principal handed to routes: the whole profile, no hash
+    PROFILE = {"password": 0}
+
+    # Existence checks
+    ID_ONLY = {"_id": 1}
+
+    # ETag checks (see app.core.library_version)
+    LIBRARY_VERSION = {"_id": 0, "library_version": 1}
+
+    @property
+    def collection(self):
+        return db.users
+
+    # ── Reads ─────────────────────────────────────────────────────────────
+    async def get_by_id(self, user_id, projection: dict = PROFILE) -> dict | None:
+        """Fetch a user by id with the given projection"""
+        return await self.collection.find_one({"_id": ObjectId(user_id)}, projection)
+
+    async def get_by_login(self, login: str, projection: dict = LOGIN) -> dict | None:
+        """Fetch a user by email or user name"""
+        login = login.lower()
+        return await self.collection.find_one(
+            {"$or": [{"email": login}, {"user_name": login}]}, projection
+        )
+
+    async def get_by_email(self, email: str, projection: dict = EMAIL) -> dict | None:
+        """Fetch a user by email"""
+        return await self.collection.find_one({"email": email.lower()}, projection)
+
+    async def email_exists(self, email: str) -> bool:
+        return await self.collection.find_one({"email": email.lower()}, self.ID_ONLY) is not None
+
+    async def user_name_exists(self, user_name: str) -> bool:
+        return await self.collection.find_one({"user_name": user_name.lower()}, self.ID_ONLY) is not None
+
+    # ── Writes ────────────────────────────────────────────────────────────
+    async def create(self, user: dict) -> ObjectId:
+        """Insert a new user and return its id"""
+        result = await self.collection.insert_one(user)
+        return result.inserted_id
+
+    async def update(
+        self, user_id, fields: dict, inc: dict | None = None, extra_filter: dict | None = None
+    ) -> UpdateResult:
+        """$set fields (and optionally $inc counters) on one user"""
+        update = {"$set": fields}
+        if inc:
+            update["$inc"] = inc
+        return await self.collection.update_one(
+            {"_id": ObjectId(user_id), **(extra_filter or {})}, update
+        )
+
+    async def update_and_get(
+        self, user_id, fields: dict, projection: dict = PROFILE, inc: dict | None = None
+    ) -> dict | None:
+        """$set fields (and optionally $inc counters) and return the updated document in the same round trip"""
+        update = {"$set": fields}
+        if inc:
+            update["$inc"] = inc
+        return await self.collection.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            update,
+            projection=projection,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def increment(self, user_id, field: str, projection: dict = AUTH) -> dict | None:
+        """Atomically $inc a counter and return the updated document"""
+        return await self.collection.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$inc": {field: 1}},
+            projection=projection,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def delete(self, user_id) -> DeleteResult:
+        return await self.collection.delete_one({"_id": ObjectId(user_id)})
+
+
+user_repository = UserRepository()
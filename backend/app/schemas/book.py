@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from typing import Literal
 
 
 # Request Schemas
@@ -36,6 +37,17 @@ class BookUpdateRequest(BaseModel):
     format: str | None = None
 
 
+class BookBulkOperation(BaseModel):
+    op: Literal["update", "delete", "favorite"]
+    id: str
+    data: BookUpdateRequest | None = None       # fields to set for "update"
+    is_favorite: bool | None = None             # "favorite": set this value, or toggle when omitted
+
+
+class BookBulkRequest(BaseModel):
+    operations: list[BookBulkOperation] = Field(..., min_length=1, max_length=100)
+
+
 class BookFilterParams(BaseModel):
     favorite: bool | None = None
     genre: str | None = None
@@ -97,13 +109,80 @@ class BookResponse(BaseModel):
         )
 
 
+class BookPartialResponse(BaseModel):
+    """A book trimmed to the fields requested with `fields=`"""
+    id: str
+    title: str | None = None
+    author: str | None = None
+    isbn: str | None = None
+    genre: str | None = None
+    rating: float | None = None
+    description: str | None = None
+    cover_image: str | None = None
+    reading_started: datetime | None = None
+    reading_finished: datetime | None = None
+    is_favorite: bool | None = None
+    page_count: int | None = None
+    publisher: str | None = None
+    publication_year: int | None = None
+    language: str | None = None
+    format: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
 class BooksListResponse(BaseModel):
-    books: list[BookResponse]
+    books: list[BookResponse | BookPartialResponse]
     total: int
     page: int
     pages: int
     has_next: bool
     has_prev: bool
+    next_cursor: str | None = None
+
+
+class BookChangesResponse(BaseModel):
+    books: list[BookResponse]       # created or updated since the token
+    deleted: list[str]              # ids deleted since the token (final page only)
+    next_since: str
+    has_more: bool
+
+
+class BookBatchResponse(BaseModel):
+    books: list[BookResponse | BookPartialResponse]     # in the requested order
+    missing: list[str]              # ids that are invalid, deleted or not the user's
+
+
+class BookNeighborsResponse(BaseModel):
+    id: str
+    sort: str
+    previous: BookResponse | BookPartialResponse | None
+    next: BookResponse | BookPartialResponse | None
+
+
+class BookBulkResult(BaseModel):
+    index: int                      # position in the request's operations
+    id: str
+    op: str
+    status: int                     # 200 updated, 204 deleted, 400 / 404 failed
+    detail: str | None = None
+
+
+class BookBulkResponse(BaseModel):
+    results: list[BookBulkResult]
+    succeeded: int
+    failed: int
+
+
+class BookSuggestion(BaseModel):
+    text: str
+    type: str       # "title", "author" or "genre"
+    count: int      # books using this title/author/genre
+
+
+class BookSuggestionsResponse(BaseModel):
+    query: str
+    suggestions: list[BookSuggestion]
 
 
 class BookStatsResponse(BaseModel):
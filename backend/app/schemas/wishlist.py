@@ -54,10 +54,34 @@ class WishlistResponse(BaseModel):
     updated_at: datetime
 
 
+class WishlistPartialResponse(BaseModel):
+    """A wishlist item trimmed to the fields requested with `fields=`"""
+    id: str
+    title: str | None = None
+    author: str | None = None
+    isbn: str | None = None
+    genre: str | None = None
+    priority: int | None = None
+    notes: str | None = None
+    price: Decimal | None = None
+    acquisition_type: str | None = None
+    where_to_buy: str | None = None
+    borrowed_from: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
 class WishlistListResponse(BaseModel):
-    wishlist: list[WishlistResponse]
+    wishlist: list[WishlistResponse | WishlistPartialResponse]
     total: int
     page: int
     pages: int
     has_prev: bool
     has_next: bool
+
+
+class WishlistChangesResponse(BaseModel):
+    wishlist: list[WishlistResponse]    # created or updated since the token
+    deleted: list[str]                  # ids deleted since the token (final page only)
+    next_since: str
+    has_more: bool
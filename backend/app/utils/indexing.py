@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+from app.utils.search import normalize_field, search_tokens
+
+
+# Source fields whose change requires recomputing the derived fields below
+BOOK_INDEX_SOURCES = frozenset({"title", "author", "genre", "reading_started"})
+WISHLIST_INDEX_SOURCES = frozenset({"title", "author", "genre"})
+
+
+def reading_year(started: datetime | None) -> int | None:
+    """UTC calendar year of reading_started (the year MongoDB's $year reports)"""
+    if not isinstance(started, datetime):
+        return None
+    if started.tzinfo is not None:
+        started = started.astimezone(timezone.utc)
+    return started.year
+
+
+def year_range(year: int) -> dict:
+    """Half-open UTC range covering one calendar year, for index range scans"""
+    return {
+        "$gte": datetime(year, 1, 1, tzinfo=timezone.utc),
+        "$lt": datetime(year + 1, 1, 1, tzinfo=timezone.utc),
+    }
+
+
+def book_index_fields(book: dict) -> dict:
+    """
+    Derived, query-only fields stored on every book document
+
+    Every write path (create, update, import, move-to-library) merges
+    these into the document it writes; migrations/backfill_index_fields.py
+    fills them in for existing data.
+    """
+    return {
+        "search_tokens": search_tokens(book.get("title"), book.get("author")),
+        "title_norm": normalize_field(book.get("title")),
+        "author_norm": normalize_field(book.get("author")),
+        "genre_norm": normalize_field(book.get("genre")),
+        "reading_year": reading_year(book.get("reading_started")),
+    }
+
+
+def wishlist_index_fields(item: dict) -> dict:
+    """Derived, query-only fields stored on every wishlist document"""
+    return {
+        "search_tokens": search_tokens(item.get("title"), item.get("author")),
+        "title_norm": normalize_field(item.get("title")),
+        "author_norm": normalize_field(item.get("author")),
+        "genre_norm": normalize_field(item.get("genre")),
+    }
+
+
+def stale_index_fields(doc: dict, index_fields) -> dict:
+    """The derived fields of `doc` whose stored value is out of date"""
+    return {k: v for k, v in index_fields(doc).items() if doc.get(k) != v}
@@ -0,0 +1,116 @@
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.core.config import settings
+
+
+def parse_fields(fields: str | None, allowed) -> list[str] | None:
+    """
+    Validate a comma-separated `fields=` value against the response fields
+
+    Returns None when no selection was requested; `id` is always returned
+    and may be listed or not.
+    """
+    if not fields:
+        return None
+
+    selected = []
+    for name in (f.strip() for f in fields.split(",")):
+        if not name or name == "id" or name in selected:
+            continue
+        if name not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown field '{name}'. Allowed: {', '.join(sorted(allowed))}",
+            )
+        selected.append(name)
+    return selected
+
+
+def field_projection(fields: list[str] | None, sort: list[tuple[str, int]]) -> dict | None:
+    """Mongo projection for the selected fields plus the sort keys (for cursors)"""
+    if fields is None:
+        return None
+    return {**{field: 1 for field in fields}, **{field: 1 for field, _ in sort}}
+
+
+async def find_page(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    sort: list[tuple[str, int]],
+    limit: int,
+    skip: int = 0,
+    seek: dict | None = None,
+    stages: list[dict] | None = None,
+    projection: dict | None = None,
+    mode: str | None = None,
+) -> tuple[list[dict], int]:
+    """
+    Fetch one page of `query` in `sort` order together with the total count
+
+    The page starts at `skip`, or right after a keyset position when `seek`
+    (from keyset_filter) is given; `total` always counts the whole query.
+
+    "find" mode (the default, see LIST_QUERY_MODE) sends count_documents
+    and a find: two round trips, but the find stops after `limit` index
+    entries and the count can be a covered index scan. "facet" mode gets
+    both from one aggregation, which saves a round trip on small libraries
+    but fetches every matching document into the $facet (subject to the
+    100MB stage and 16MB result limits), so a page costs O(matches);
+    benchmarks/bench_listing.py shows the crossover.
+
+    A `seek` always uses the two-query form whatever the mode: $facet
+    buffers every document it receives, so seeking inside it would fetch
+    the whole result set, while a top-level seek is a bounded index walk.
+
+    `stages` (e.g. a relevance $addFields) run between the match and the
+    sort, which requires the aggregation path regardless of mode.
+    `projection` trims only the returned page, after any computed fields.
+    """
+    mode = mode or settings.LIST_QUERY_MODE
+
+    if (mode == "find" or seek) and not stages:
+        total = await collection.count_documents(query)
+        page_query = {"$and": [query, seek]} if seek else query
+        cursor = collection.find(page_query, projection).sort(sort)
+        if skip and not seek:
+            cursor = cursor.skip(skip)
+        items = await cursor.limit(limit).to_list(length=limit)
+        return items, total
+
+    if seek:
+        # Computed sort keys (e.g. relevance score) exist only after `stages`
+        pipeline = [
+            {"$match": query},
+            *stages,
+            {"$match": seek},
+            {"$sort": dict(sort)},
+            {"$limit": limit},
+        ]
+        if projection:
+            pipeline.append({"$project": projection})
+        total = await collection.count_documents(query)
+        items = await collection.aggregate(pipeline).to_list(length=limit)
+        return items, total
+
+    page_stages = [{"$skip": skip}] if skip else []
+    page_stages.append({"$limit": limit})
+    if projection:
+        page_stages.append({"$project": projection})
+
+    pipeline = [
+        {"$match": query},
+        *(stages or []),
+        {"$sort": dict(sort)},
+        {
+            "$facet": {
+                "items": page_stages,
+                "total": [{"$count": "count"}],
+            }
+        },
+    ]
+
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    facets = result[0] if result else {"items": [], "total": []}
+    total = facets["total"][0]["count"] if facets["total"] else 0
+    return facets["items"], total
@@ -0,0 +1,93 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from bson import ObjectId, json_util
+
+
+# Types a sort key may hold; anything else (sub-documents, arrays, regexes)
+# would turn the seek filter into something other than a comparison
+_SCALARS = (type(None), bool, int, float, str, datetime, ObjectId)
+
+
+def with_tiebreaker(sort: list[tuple[str, int]]) -> list[tuple[str, int]]:
+    """Append `_id` (in the last key's direction) so the order is total"""
+    if any(field == "_id" for field, _ in sort):
+        return sort
+    return [*sort, ("_id", sort[-1][1] if sort else 1)]
+
+
+def reverse_sort(sort: list[tuple[str, int]]) -> list[tuple[str, int]]:
+    """The same keys in the opposite direction (walking a list backwards)"""
+    return [(field, -direction) for field, direction in sort]
+
+
+def encode_cursor(sort_name: str, values: list) -> str:
+    """Opaque cursor holding the sort name and the last row's sort keys"""
+    payload = json_util.dumps({"s": sort_name, "v": values})
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_name: str, size: int) -> list:
+    """
+    Return the `size` sort-key values stored in a cursor, or raise ValueError
+
+    Cursors come from clients, so the payload is checked to be exactly one
+    scalar per sort key before it reaches keyset_filter.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(urlsafe_b64decode(padded.encode()).decode())
+        values = payload["v"]
+        issued_for = payload["s"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if issued_for != sort_name:
+        raise ValueError("Cursor was issued for a different sort order")
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(value, _SCALARS) for value in values)
+    ):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def cursor_values(doc: dict, sort: list[tuple[str, int]]) -> list:
+    """The sort-key values of a document, in sort order"""
+    return [doc.get(field) for field, _ in sort]
+
+
+def _after(field: str, direction: int, value) -> dict | None:
+    """Condition for rows strictly after `value` on one key (nulls sort first)"""
+    if direction == 1:
+        if value is None:
+            return {field: {"$ne": None}}
+        return {field: {"$gt": value}}
+
+    # Descending: nothing comes after null; nulls follow every real value
+    if value is None:
+        return None
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: list[tuple[str, int]], values: list) -> dict:
+    """
+    Filter for the rows that follow `values` in `sort` order
+
+    Expands the lexicographic comparison (k1, k2, ..., _id) > (v1, v2, ...)
+    into an $or of index-friendly equality/range branches, so each page is
+    a bounded index seek instead of a growing skip.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        after = _after(field, direction, values[i])
+        if after is None:
+            continue
+        equal_prefix = [{f: values[j]} for j, (f, _) in enumerate(sort[:i])]
+        branches.append({"$and": [*equal_prefix, after]} if equal_prefix else after)
+
+    if not branches:
+        # Past the end: match nothing
+        return {"_id": {"$exists": False}}
+    return {"$or": branches}
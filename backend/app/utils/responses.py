@@ -0,0 +1,39 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson doesn't encode natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        # Same as pydantic's JSON output for Decimal fields
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any, indent: bool = False) -> bytes:
+    """Encode with orjson (datetimes as ISO 8601, UTC as `Z`, ObjectId as str)"""
+    options = _OPTIONS | orjson.OPT_INDENT_2 if indent else _OPTIONS
+    return orjson.dumps(content, default=_default, option=options)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson, for output built by our serializers
+
+    A route that returns one directly skips FastAPI's response_model
+    validation and jsonable_encoder pass, so a serialize_*() dict is
+    encoded exactly once. Keep `response_model` on the decorator for the
+    OpenAPI schema; the serializer is what guarantees the shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+
+
+MIN_GRAM = 1
+MAX_GRAM = 15
+MAX_TERMS = 8
+
+# Letters and digits in any script ("\w" without the underscore)
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# Filter that matches no document, for queries with nothing searchable
+MATCH_NOTHING = {"_id": {"$exists": False}}
+
+
+def normalize_text(text: str | None) -> str:
+    """Lowercase and strip accents so "Émile" and "emile" compare equal"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def normalize_field(text: str | None) -> str | None:
+    """
+    Sort/filter key for a display field: accent-folded, lowercase, single-spaced
+
+    Stored as `<field>_norm` so case-insensitive sorts and prefix filters
+    become plain index range scans.
+    """
+    normalized = " ".join(normalize_text(text).split())
+    return normalized or None
+
+
+def prefix_filter(field: str, text: str) -> dict:
+    """
+    Anchored, case-sensitive prefix match on a normalized field
+
+    A `^literal` regex without options is turned into index bounds, unlike
+    the unanchored `$options: "i"` regexes it replaces.
+    """
+    normalized = normalize_field(text)
+    if normalized is None:
+        return {}
+    return {field: {"$regex": "^" + re.escape(normalized)}}
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Normalized words of a string"""
+    return _WORD_RE.findall(normalize_text(text))
+
+
+def search_tokens(*texts: str | None) -> list[str]:
+    """
+    Edge n-grams of every word in `texts`, for the `search_tokens` field
+
+    "The Hobbit" -> ["t", "th", "the", "h", "ho", "hob", ...]. Stored per
+    document and indexed with user_id, so a prefix search is an index
+    lookup on (user_id, token) rather than a regex over every title.
+    """
+    tokens = set()
+    for text in texts:
+        for word in tokenize(text):
+            for size in range(MIN_GRAM, min(len(word), MAX_GRAM) + 1):
+                tokens.add(word[:size])
+    return sorted(tokens)
+
+
+def search_terms(query: str) -> list[str]:
+    """Query words, truncated to the longest stored gram"""
+    terms = []
+    for word in tokenize(query):
+        term = word[:MAX_GRAM]
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def search_filter(query: str) -> dict:
+    """
+    Match documents where every query word prefixes some title/author word
+
+    A blank query adds no condition; a non-blank one with no letters or
+    digits (e.g. "!!!") matches nothing rather than the whole library.
+    """
+    if not query or not query.strip():
+        return {}
+    terms = search_terms(query)
+    if not terms:
+        return MATCH_NOTHING
+    if len(terms) == 1:
+        return {"search_tokens": terms[0]}
+    return {"search_tokens": {"$all": terms}}
+
+
+def relevance_stage(query: str) -> dict:
+    """
+    $addFields stage computing a `score` for ranking search results
+
+    Runs only on documents that already passed search_filter, so the regex
+    work is bounded by the match count, not the library size. A title that
+    starts with the query ranks first, then a title containing it as a
+    word prefix, then author matches; each matched term adds a little.
+    """
+    phrase = re.escape(query.strip())
+    terms = [re.escape(term) for term in search_terms(query)]
+
+    def matches(field: str, pattern: str) -> dict:
+        return {
+            "$regexMatch": {
+                "input": {"$ifNull": [f"${field}", ""]},
+                "regex": pattern,
+                "options": "i",
+            }
+        }
+
+    # Word start in any script (PCRE's \b only knows ASCII letters)
+    word_start = r"(?<![\p{L}\p{N}])"
+
+    def points(condition: dict, weight: int) -> dict:
+        return {"$cond": [condition, weight, 0]}
+
+    score = [
+        points(matches("title", f"^{phrase}"), 8),
+        points(matches("title", word_start + phrase), 4),
+        points(matches("author", word_start + phrase), 2),
+    ]
+    score += [points(matches("title", word_start + term), 1) for term in terms]
+
+    return {"$addFields": {"score": {"$add": score}}}
@@ -0,0 +1,46 @@
+"""
+Email renders per second: per-call Template() vs the precompiled registry
+
+    python benchmarks/bench_email_templates.py [renders]
+"""
+import sys
+import time
+
+from common import configure_env
+
+configure_env()
+
+from jinja2 import Template
+
+from app.core.email import VERIFICATION_EMAIL_TEMPLATE, email_templates
+
+
+def _context(i: int) -> dict:
+    return {"name": f"Reader {i}", "verify_url": f"https://example.com/verify-email?token={i}"}
+
+
+def main(renders: int):
+    contexts = [_context(i) for i in range(renders)]
+
+    start = time.perf_counter()
+    for context in contexts:
+        Template(VERIFICATION_EMAIL_TEMPLATE).render(**context)
+    per_call = renders / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for context in contexts:
+        email_templates.render("verification", **context)
+    registry = renders / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    email_templates.render_batch("verification", contexts)
+    batch = renders / (time.perf_counter() - start)
+
+    print(f"Verification email x {renders}")
+    print(f"  Template() per send (HTML only):    {per_call:10.1f} renders/s")
+    print(f"  registry.render (HTML + text):      {registry:10.1f} renders/s")
+    print(f"  registry.render_batch (HTML + text):{batch:10.1f} renders/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,148 @@
+"""
+List-page latency: count_documents + find vs one $facet aggregation, and
+unanchored $regex search vs the indexed search_tokens field
+
+Needs a reachable MongoDB (MONGODB_URI from backend/.env). Seeds a
+throwaway collection, times both listing modes of find_page for an
+unfiltered first page and keyset-cursor page, a filtered shallow and deep
+page, plus both search paths, then drops the collection.
+
+The unfiltered first page is also timed for a second user with a tenth
+of the books. "find" stays flat between the two libraries while "facet"
+grows with the library, because every matching book flows into the
+$facet; that growth is why LIST_QUERY_MODE defaults to "find".
+
+    python benchmarks/bench_listing.py [books] [iterations]
+"""
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import configure_env, summarize
+
+configure_env()
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.utils.indexing import book_index_fields
+from app.utils.listing import find_page
+from app.utils.pagination import keyset_filter
+from app.utils.search import relevance_stage, search_filter
+
+
+GENRES = ["Fiction", "Fantasy", "History", "Science", "Poetry", "Biography"]
+
+
+async def _seed(collection, user_id: ObjectId, books: int):
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    docs = [
+        {
+            "user_id": user_id,
+            "title": f"Book {i:06d}",
+            "author": f"Author {i % 400}",
+            "genre": random.choice(GENRES),
+            "rating": round(random.uniform(0, 5), 1),
+            "is_favorite": i % 7 == 0,
+            "reading_started": start + timedelta(hours=i * 3),
+            "created_at": start,
+            "updated_at": start,
+        }
+        for i in range(books)
+    ]
+    for doc in docs:
+        doc.update(book_index_fields(doc))
+    await collection.insert_many(docs, ordered=False)
+    await collection.create_index([("user_id", 1), ("reading_started", -1), ("_id", -1)])
+    await collection.create_index([("user_id", 1), ("search_tokens", 1)])
+
+
+async def _time(label: str, iterations: int, **kwargs):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await find_page(**kwargs)
+        samples.append(time.perf_counter() - start)
+    summarize(label, samples)
+
+
+async def main(books: int, iterations: int):
+    client = AsyncIOMotorClient(settings.MONGODB_URI.get_secret_value())
+    collection = client[settings.MONGODB_DBNAME.get_secret_value()]["bench_listing"]
+    await collection.drop()
+
+    user_id = ObjectId()
+    small_user_id = ObjectId()
+    small_books = max(books // 10, 1)
+    await _seed(collection, user_id, books)
+    await _seed(collection, small_user_id, small_books)
+
+    query = {"user_id": user_id, "genre": {"$regex": "fi", "$options": "i"}}
+    sort = [("reading_started", -1), ("_id", -1)]
+    deep_skip = (books // len(GENRES) // 2 // 20) * 20
+
+    print(f"{books} books, {iterations} iterations per case, limit=20")
+    try:
+        # Page 1 cost against library size
+        for mode in ("find", "facet"):
+            for owner, size in ((small_user_id, small_books), (user_id, books)):
+                await _time(
+                    f"{mode} page 1 of {size}", iterations,
+                    collection=collection, query={"user_id": owner}, sort=sort, limit=20, mode=mode,
+                )
+
+        # Unfiltered pages and a keyset cursor halfway through the library
+        unfiltered = {"user_id": user_id}
+        middle = await collection.find(unfiltered, {"reading_started": 1}).sort(sort).skip(books // 2).limit(1).to_list(1)
+        seek = keyset_filter(sort, [middle[0]["reading_started"], middle[0]["_id"]])
+        for mode in ("find", "facet"):
+            await _time(
+                f"{mode} unfiltered page 1", iterations,
+                collection=collection, query=unfiltered, sort=sort, limit=20, mode=mode,
+            )
+            await _time(
+                f"{mode} unfiltered cursor", iterations,
+                collection=collection, query=unfiltered, sort=sort, limit=20, seek=seek, mode=mode,
+            )
+
+        for mode in ("find", "facet"):
+            await _time(
+                f"{mode} page 1", iterations,
+                collection=collection, query=query, sort=sort, limit=20, mode=mode,
+            )
+            await _time(
+                f"{mode} skip={deep_skip}", iterations,
+                collection=collection, query=query, sort=sort, limit=20,
+                skip=deep_skip, mode=mode,
+            )
+
+        search = "author 12"
+        regex_query = {
+            "user_id": user_id,
+            "$or": [
+                {"title": {"$regex": search, "$options": "i"}},
+                {"author": {"$regex": search, "$options": "i"}},
+            ],
+        }
+        await _time(
+            "search $regex", iterations,
+            collection=collection, query=regex_query, sort=sort, limit=20,
+        )
+        await _time(
+            "search tokens + relevance", iterations,
+            collection=collection, query={"user_id": user_id, **search_filter(search)},
+            sort=[("score", -1), *sort], limit=20, stages=[relevance_stage(search)],
+        )
+    finally:
+        await collection.drop()
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    ))
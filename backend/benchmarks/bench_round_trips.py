@@ -0,0 +1,121 @@
+"""
+Mutation round trips: find_one + update_one + find_one vs find_one_and_update
+
+Needs a reachable MongoDB (MONGODB_URI from backend/.env). Seeds a
+throwaway collection, then runs the old three-step update/toggle pattern
+and the single find_one_and_update form the routes now use. A command
+listener counts the commands each variant sends to the server.
+
+    python benchmarks/bench_round_trips.py [books] [iterations]
+"""
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from common import configure_env, summarize
+
+configure_env()
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, monitoring
+
+from app.core.config import settings
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to the server (one per round trip)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def update_three_steps(collection, book_id, user_id):
+    book = await collection.find_one({"_id": book_id, "user_id": user_id})
+    if not book:
+        return None
+    await collection.update_one(
+        {"_id": book_id}, {"$set": {"rating": 4.5, "updated_at": datetime.now(timezone.utc)}}
+    )
+    return await collection.find_one({"_id": book_id})
+
+
+async def update_one_trip(collection, book_id, user_id):
+    return await collection.find_one_and_update(
+        {"_id": book_id, "user_id": user_id},
+        {"$set": {"rating": 4.5, "updated_at": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def toggle_three_steps(collection, book_id, user_id):
+    book = await collection.find_one({"_id": book_id, "user_id": user_id})
+    if not book:
+        return None
+    await collection.update_one(
+        {"_id": book_id},
+        {"$set": {"is_favorite": not book.get("is_favorite", False), "updated_at": datetime.now(timezone.utc)}},
+    )
+    return await collection.find_one({"_id": book_id})
+
+
+async def toggle_one_trip(collection, book_id, user_id):
+    return await collection.find_one_and_update(
+        {"_id": book_id, "user_id": user_id},
+        [{"$set": {"is_favorite": {"$not": ["$is_favorite"]}, "updated_at": datetime.now(timezone.utc)}}],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _run(label, func, collection, counter, book_ids, user_id, iterations):
+    samples = []
+    counter.count = 0
+    for _ in range(iterations):
+        book_id = random.choice(book_ids)
+        start = time.perf_counter()
+        await func(collection, book_id, user_id)
+        samples.append(time.perf_counter() - start)
+    summarize(label, samples)
+    print(f"{'':<28} round trips/op={counter.count / iterations:.1f}")
+
+
+async def main(books: int, iterations: int):
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URI.get_secret_value(), event_listeners=[counter])
+    collection = client[settings.MONGODB_DBNAME.get_secret_value()]["bench_round_trips"]
+    await collection.drop()
+
+    user_id = ObjectId()
+    result = await collection.insert_many([
+        {"user_id": user_id, "title": f"Book {i:06d}", "rating": 0.0, "is_favorite": False}
+        for i in range(books)
+    ])
+    book_ids = result.inserted_ids
+
+    print(f"{books} books, {iterations} iterations per case")
+    try:
+        await _run("update: find+update+find", update_three_steps, collection, counter, book_ids, user_id, iterations)
+        await _run("update: find_one_and_update", update_one_trip, collection, counter, book_ids, user_id, iterations)
+        await _run("toggle: find+update+find", toggle_three_steps, collection, counter, book_ids, user_id, iterations)
+        await _run("toggle: pipeline $not", toggle_one_trip, collection, counter, book_ids, user_id, iterations)
+    finally:
+        await collection.drop()
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+    ))
@@ -0,0 +1,100 @@
+"""
+Serialization cost of a 100-book GET /books page: response_model path vs orjson
+
+Both paths start from the same MongoDB documents and run serialize_book.
+The "response_model" path then does what FastAPI does for a returned dict
+(validate against BooksListResponse, dump to JSON-able data, json.dumps);
+the fast path encodes the serializer output once with FastJSONResponse.
+
+    python benchmarks/bench_serialization.py [iterations]
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import configure_env, summarize
+
+configure_env()
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.routes.books import serialize_book
+from app.schemas.book import BooksListResponse
+from app.utils.responses import FastJSONResponse
+
+
+LIMIT = 100
+
+
+def _documents() -> list[dict]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": ObjectId(),
+            "title": f"Benchmark Book {i}",
+            "author": "Bench Author",
+            "isbn": "9780743273565",
+            "genre": "Fiction",
+            "rating": 4.5,
+            "description": "A long description. " * 60,
+            "cover_image": "https://res.cloudinary.com/demo/image/upload/cover.jpg",
+            "reading_started": start + timedelta(days=i),
+            "reading_finished": start + timedelta(days=i + 10),
+            "is_favorite": i % 3 == 0,
+            "page_count": 320,
+            "publisher": "Bench House",
+            "publication_year": 1999,
+            "language": "English",
+            "format": "paperback",
+            "created_at": start,
+            "updated_at": start,
+        }
+        for i in range(LIMIT)
+    ]
+
+
+def _page(books: list[dict]) -> dict:
+    return {
+        "books": [serialize_book(book) for book in books],
+        "total": 5000,
+        "page": 1,
+        "pages": 50,
+        "has_next": True,
+        "has_prev": False,
+        "next_cursor": None,
+    }
+
+
+async def main(iterations: int):
+    books = _documents()
+    field = create_response_field(name="Response_list_books", type_=BooksListResponse)
+
+    async def response_model_path() -> bytes:
+        content = await serialize_response(
+            field=field, response_content=_page(books), is_coroutine=True
+        )
+        return JSONResponse(content).body
+
+    async def fast_path() -> bytes:
+        return FastJSONResponse(_page(books)).body
+
+    size_slow = len(await response_model_path())
+    size_fast = len(await fast_path())
+    print(f"GET /books?limit={LIMIT} body: {size_slow} bytes (response_model), {size_fast} bytes (orjson)")
+
+    for label, render in (("response_model + json", response_model_path), ("FastJSONResponse", fast_path)):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await render()
+            samples.append(time.perf_counter() - start)
+        summarize(label, samples)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,64 @@
+"""
+Type-ahead latency of the in-memory trigram index (no MongoDB needed)
+
+Builds a SuggestIndex for one synthetic library and times prefix queries
+of increasing length, as a user typing into the SearchBar would send.
+
+    python benchmarks/bench_suggest.py [books] [iterations]
+"""
+import random
+import sys
+import time
+
+from common import configure_env, summarize
+
+configure_env()
+
+from app.core.suggest import SuggestIndex
+
+
+WORDS = [
+    "shadow", "river", "night", "garden", "empire", "silent", "winter", "glass",
+    "harbor", "letters", "kingdom", "orchard", "stone", "memory", "island", "crown",
+]
+SURNAMES = ["Hughes", "Okafor", "Lindqvist", "Moreau", "Tanaka", "Silva", "Novak", "Haddad"]
+GENRES = ["Fiction", "Fantasy", "History", "Science", "Poetry", "Biography", "Mystery"]
+
+
+def _library(books: int) -> list[dict]:
+    rng = random.Random(42)
+    return [
+        {
+            "_id": str(i),
+            "title": " ".join(rng.sample(WORDS, 3)).title() + f" {i}",
+            "author": f"{rng.choice('ABCDEFGHJKLMNPRS')}. {rng.choice(SURNAMES)}",
+            "genre": rng.choice(GENRES),
+        }
+        for i in range(books)
+    ]
+
+
+def main(books: int, iterations: int):
+    library = _library(books)
+
+    start = time.perf_counter()
+    index = SuggestIndex()
+    for book in library:
+        index.add_book(book["_id"], book)
+    build = time.perf_counter() - start
+
+    print(f"{books} books: built in {build * 1000:.1f} ms, ~{index.size_bytes / 1024:.0f} KiB")
+    for query in ("s", "sh", "sha", "shadow", "shadow riv", "hug", "fan"):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            index.query(query, 10)
+            samples.append(time.perf_counter() - start)
+        summarize(f"q={query!r}", samples)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+    )
@@ -0,0 +1,81 @@
+"""
+Requests per second on GET /auth/me with and without the JWT decode cache
+
+The users collection is replaced by an in-memory stand-in so the numbers
+isolate token verification and request handling from MongoDB latency.
+
+    python benchmarks/bench_token_cache.py [requests]
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+
+from common import configure_env
+
+configure_env()
+
+import httpx
+from bson import ObjectId
+
+from app.core import security
+from app.core.database import db
+from app.core.dependencies import principal_cache
+from main import app
+
+
+USER = {
+    "_id": ObjectId(),
+    "full_name": "Bench Reader",
+    "user_name": "bench_reader",
+    "email": "bench@example.com",
+    "theme": "light",
+    "is_verified": True,
+    "is_active": True,
+    "created_at": datetime.now(timezone.utc),
+}
+
+
+class _InMemoryUsers:
+    async def find_one(self, query, *args, **kwargs):
+        return USER if query.get("_id") == USER["_id"] else None
+
+
+class _InMemoryDatabase:
+    users = _InMemoryUsers()
+
+
+async def _run(client: httpx.AsyncClient, headers: dict, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get("/auth/me", headers=headers)
+        response.raise_for_status()
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int):
+    db._db = _InMemoryDatabase()
+    token = security.create_access_token(data=security.access_token_claims(USER))
+    headers = {"Authorization": f"Bearer {token}"}
+    cache_size = security.token_cache.max_size
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up both caches and the event loop
+        await _run(client, headers, 100)
+
+        security.token_cache.max_size = 0
+        security.token_cache.clear()
+        without_cache = await _run(client, headers, requests)
+
+        security.token_cache.max_size = cache_size
+        with_cache = await _run(client, headers, requests)
+
+    print(f"GET /auth/me x {requests} (principal cache hit ratio {principal_cache.stats()['hit_ratio']})")
+    print(f"  without decode cache: {without_cache:10.1f} req/s")
+    print(f"  with decode cache:    {with_cache:10.1f} req/s")
+    print(f"  speedup:              {with_cache / without_cache:10.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -10,6 +10,15 @@ from colorama import Fore, init
 
 from app.core.config import settings
 from app.core.database import db
+from app.core.dependencies import principal_cache
+from app.core.outbox import email_outbox
+from app.core.hashing import password_pool, start_password_pool
+from app.core.indexes import index_reconciler
+from app.core.neighbors import order_cache
+from app.core.rate_limit import login_throttle
+from app.core.write_behind import last_login_buffer
+from app.core.security import token_cache
+from app.core.suggest import suggest_indexes
 from app.api.routes import auth, books, data, users, wishlist
 
 
@@ -27,12 +36,20 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(Fore.GREEN + "Starting My Reading Journey API...")
     await db.connect()
+    index_reconciler.start(db.db)          # Builds missing indexes without blocking readiness
+    await start_password_pool()
+    last_login_buffer.start()
+    email_outbox.start()
     logger.info(Fore.GREEN + "Application startup complete")
     
     yield
     
     # Shutdown
     logger.info(Fore.GREEN + "Shutting down...")
+    await index_reconciler.stop()
+    await email_outbox.stop()
+    await last_login_buffer.stop()         # Flush buffered last_login writes before the DB closes
+    password_pool.shutdown()
     await db.close()
     logger.info(Fore.GREEN + "Shutdown complete")
 
@@ -56,7 +73,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"]       # Necessary for file downloads
+    expose_headers=["Content-Disposition", "ETag"]       # File downloads, conditional GETs
 )
 
 
@@ -87,7 +104,8 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """Handle HTTP exceptions"""
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None)       # Keep Retry-After / WWW-Authenticate
     )
 
 
@@ -158,6 +176,27 @@ async def health_check():
     }
 
 
+# Cache / throttle counters for capacity planning. Internal numbers, so
+# only exposed in DEBUG (like /docs) or when METRICS_ENABLED is set
+async def metrics():
+    """In-process counters (per worker)"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "bcrypt_pool": password_pool.stats(),
+        "login_throttle": login_throttle.stats(),
+        "last_login_buffer": last_login_buffer.stats(),
+        "email_outbox": email_outbox.stats(),
+        "suggest_indexes": suggest_indexes.stats(),
+        "index_reconciler": index_reconciler.stats(),
+        "neighbor_order_cache": order_cache.stats(),
+    }
+
+
+if settings.DEBUG or settings.METRICS_ENABLED:
+    app.get("/metrics", tags=["Health"])(metrics)
+
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
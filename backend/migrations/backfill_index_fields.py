@@ -0,0 +1,57 @@
+import os
+import sys
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.indexing import book_index_fields, stale_index_fields, wishlist_index_fields
+
+
+load_dotenv()
+
+BATCH_SIZE = 1000
+
+
+async def _backfill(collection, index_fields):
+    """Recompute derived fields for every document, writing only the stale ones"""
+    checked = 0
+    updated = 0
+    operations = []
+
+    async for doc in collection.find({}):
+        checked += 1
+        stale = stale_index_fields(doc, index_fields)
+        if stale:
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': stale}))
+
+        if len(operations) >= BATCH_SIZE:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+
+    if operations:
+        result = await collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+    print(f"{collection.name}: checked {checked}, updated {updated}")
+
+
+async def backfill_index_fields():
+    """Fill in search/index fields on existing books and wishlist items (safe to re-run)"""
+    
+    # Connect to MongoDB
+    client = AsyncIOMotorClient(os.getenv('MONGODB_URI'))
+    db = client[os.getenv('MONGODB_DBNAME', 'myreadingjourney')]
+    
+    await _backfill(db.books, book_index_fields)
+    await _backfill(db.wishlist, wishlist_index_fields)
+    
+    print("\nBackfill complete!")
+    
+    client.close()
+
+if __name__ == '__main__':
+    asyncio.run(backfill_index_fields())
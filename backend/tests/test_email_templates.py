@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("jinja2")
+pytest.importorskip("motor")
+
+from app.core.email import email_templates
+
+
+@pytest.mark.parametrize(
+    "template, url_key",
+    [("verification", "verify_url"), ("reset_password", "reset_url")],
+)
+def test_render_accepts_name_in_context(template, url_key):
+    url = "https://example.com/link?token=abc"
+    rendered = email_templates.render(template, name="Ada <Lovelace>", **{url_key: url})
+
+    assert "Hello Ada &lt;Lovelace&gt;," in rendered.html
+    assert "Hello Ada <Lovelace>," in rendered.text
+    assert url in rendered.html
+    assert url in rendered.text
+
+
+def test_render_batch_matches_render():
+    contexts = [{"name": f"Reader {i}", "verify_url": f"https://example.com/{i}"} for i in range(3)]
+
+    batch = email_templates.render_batch("verification", contexts)
+
+    assert batch == [email_templates.render("verification", **context) for context in contexts]
@@ -0,0 +1,123 @@
+"""
+explain() checks that list filters and sorts are served by the manifest
+
+Builds app/core/indexes.py's manifest in a throwaway database, seeds a
+few hundred books and wishlist items, and fails a case when its winning
+plan scans the collection, or sorts in memory where an index should
+provide the order.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("motor")
+
+from bson import ObjectId
+
+from app.core.indexes import IndexReconciler
+from app.utils.indexing import book_index_fields, wishlist_index_fields, year_range
+from app.utils.pagination import keyset_filter, reverse_sort
+from app.utils.search import prefix_filter
+
+
+GENRES = ["Fiction", "Fantasy", "History", "Science Fiction", "Poetry", "Biography"]
+AUTHORS = ["Émile Zola", "emily brontë", "Zadie Smith", "apple Author", "Ursula Le Guin"]
+
+USER_ID = ObjectId()
+BASE = {"user_id": USER_ID}
+DATE_DESC = [("reading_started", -1), ("_id", -1)]
+TITLE_ASC = [("title_norm", 1), ("_id", 1)]
+ANCHOR = [datetime(2020, 6, 1), ObjectId()]
+
+CASES = [
+    # (label, collection, filter, sort, in-memory sort allowed)
+    ("books genre=fic", "books", {**BASE, **prefix_filter("genre_norm", "fic")}, None, False),
+    ("books genre=Science Fiction", "books", {**BASE, **prefix_filter("genre_norm", "Science Fiction")}, None, False),
+    ("books author=emil", "books", {**BASE, **prefix_filter("author_norm", "emil")}, None, False),
+    ("books title_asc", "books", BASE, TITLE_ASC, False),
+    ("books title_desc", "books", BASE, [("title_norm", -1), ("_id", -1)], False),
+    ("books author_asc", "books", BASE, [("author_norm", 1), ("_id", 1)], False),
+    ("books year=2020", "books", {**BASE, "reading_started": year_range(2020)}, [("reading_started", -1)], False),
+    ("books genre + date_desc", "books", {**BASE, **prefix_filter("genre_norm", "fan")}, DATE_DESC, True),
+    ("books rating_desc", "books", BASE, [("rating", -1), ("_id", -1)], False),
+    ("books date_desc", "books", BASE, DATE_DESC, False),
+    ("books next (date_desc)", "books", {**BASE, **keyset_filter(DATE_DESC, ANCHOR)}, DATE_DESC, False),
+    ("books previous (date_desc)", "books", {**BASE, **keyset_filter(reverse_sort(DATE_DESC), ANCHOR)}, reverse_sort(DATE_DESC), False),
+    ("books next (title_asc)", "books", {**BASE, **keyset_filter(TITLE_ASC, ["m", ANCHOR[1]])}, TITLE_ASC, False),
+    ("wishlist genre=bio", "wishlist", {**BASE, **prefix_filter("genre_norm", "bio")}, None, False),
+    ("wishlist title_asc", "wishlist", BASE, [("title_norm", 1)], False),
+    ("wishlist priority_desc", "wishlist", BASE, [("priority", -1), ("created_at", -1)], False),
+    ("wishlist priority_asc", "wishlist", BASE, [("priority", 1), ("created_at", -1)], False),
+    ("wishlist date_desc", "wishlist", BASE, [("created_at", -1)], False),
+]
+
+
+def _stages(plan: dict) -> list[str]:
+    """Every stage name in a (possibly nested) winning plan"""
+    names = [plan.get("stage", "")]
+    for child in ("inputStage", "queryPlan"):
+        if child in plan:
+            names += _stages(plan[child])
+    for sub in plan.get("inputStages", []):
+        names += _stages(sub)
+    return names
+
+
+async def _seed(database):
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    books = []
+    for i in range(400):
+        book = {
+            "user_id": USER_ID,
+            "title": f"{'Zebra' if i % 2 else 'apple'} story {i}",
+            "author": AUTHORS[i % len(AUTHORS)],
+            "genre": GENRES[i % len(GENRES)],
+            "rating": i % 5,
+            "is_favorite": i % 9 == 0,
+            "reading_started": start + timedelta(days=i),
+        }
+        book.update(book_index_fields(book))
+        books.append(book)
+    await database.books.insert_many(books)
+
+    items = []
+    for i in range(200):
+        item = {
+            "user_id": USER_ID,
+            "title": f"Wish {i}",
+            "author": AUTHORS[i % len(AUTHORS)],
+            "genre": GENRES[i % len(GENRES)],
+            "priority": i % 5 + 1,
+            "created_at": start + timedelta(days=i),
+        }
+        item.update(wishlist_index_fields(item))
+        items.append(item)
+    await database.wishlist.insert_many(items)
+
+
+@pytest.fixture
+async def indexed_db(mongo_db):
+    reconciler = IndexReconciler()
+    await reconciler.reconcile(mongo_db)
+    assert reconciler.failed == 0
+    await _seed(mongo_db)
+    return mongo_db
+
+
+@pytest.mark.parametrize(
+    "collection, query, sort, sort_allowed",
+    [case[1:] for case in CASES],
+    ids=[case[0] for case in CASES],
+)
+async def test_winning_plan_uses_an_index(indexed_db, collection, query, sort, sort_allowed):
+    cursor = indexed_db[collection].find(query).limit(20)
+    if sort:
+        cursor = cursor.sort(sort)
+    explain = await cursor.explain()
+    stages = _stages(explain["queryPlanner"]["winningPlan"])
+    plan = " <- ".join(stages)
+
+    assert "COLLSCAN" not in stages, plan
+    assert "IXSCAN" in stages, plan
+    if not sort_allowed:
+        assert "SORT" not in stages, plan
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("aiosmtplib")
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.outbox import OUTBOX_COLLECTION, EmailOutbox
+
+
+class RecordingHandler:
+    """aiosmtpd handler keeping every delivered message, optionally slowly"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.recipients = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def _start_smtp(monkeypatch, handler) -> "controller_module.Controller":
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=0)
+    controller.start()
+    monkeypatch.setattr(settings, "MAIL_SERVER", controller.hostname)
+    monkeypatch.setattr(settings, "MAIL_PORT", controller.server.sockets[0].getsockname()[1])
+    monkeypatch.setattr(settings, "MAIL_USE_TLS", False)
+    monkeypatch.setattr(settings, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(settings, "MAIL_USE_CREDENTIALS", False)
+    return controller
+
+
+@pytest.fixture
+def outbox_db(mongo_db, monkeypatch):
+    monkeypatch.setattr(db, "_db", mongo_db)
+    return mongo_db
+
+
+async def test_drain_sends_due_messages_over_smtp(outbox_db, monkeypatch):
+    handler = RecordingHandler()
+    controller = _start_smtp(monkeypatch, handler)
+    outbox = EmailOutbox()
+    try:
+        await outbox.enqueue_many([
+            {"to": f"reader{i}@example.com", "subject": "Hello", "html": "<p>Hi</p>", "text": "Hi"}
+            for i in range(3)
+        ])
+        assert await outbox.drain() == 3
+    finally:
+        await outbox.stop()
+        controller.stop()
+
+    assert sorted(handler.recipients) == [f"reader{i}@example.com" for i in range(3)]
+    assert await outbox_db[OUTBOX_COLLECTION].count_documents({"status": "sent"}) == 3
+    assert outbox.stats()["sent"] == 3
+
+
+async def test_stop_does_not_wait_for_the_backlog(outbox_db, monkeypatch):
+    handler = RecordingHandler(delay=0.2)
+    controller = _start_smtp(monkeypatch, handler)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 1)
+    outbox = EmailOutbox()
+    try:
+        await outbox.enqueue_many([
+            {"to": f"reader{i}@example.com", "subject": "Hello", "html": "<p>Hi</p>"}
+            for i in range(10)
+        ])
+        outbox.start()
+        while outbox.sent == 0:
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(outbox.stop(), timeout=1.0)
+    finally:
+        controller.stop()
+
+    pending = await outbox_db[OUTBOX_COLLECTION].count_documents({"status": "pending"})
+    assert outbox.sent < 10
+    assert pending == 10 - outbox.sent